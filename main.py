@@ -1,15 +1,25 @@
 import sys
 import os
 import argparse
-import json
+import asyncio
+import atexit
+import copy
+import functools
+import itertools
+import queue
+import random
 import time
 import logging
+import logging.handlers
 import signal
+from typing import List, Tuple
 
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+from src.core.transaction import Transaction
 from src.network.socket_node import SocketNode
+from src.util import serde
 
 
 def parse_arguments():
@@ -45,6 +55,34 @@ def parse_arguments():
     return parser.parse_args()
 
 
+@functools.lru_cache(maxsize=32)
+def _load_config_cached(consensus_type: str, config_dir: str) -> dict:
+    """
+    Read and merge the config files once per process
+    
+    The returned dict is shared between callers and must not be mutated.
+    
+    Args:
+        consensus_type: Type of consensus algorithm
+        config_dir: Normalized directory containing config files
+        
+    Returns:
+        dict: Configuration parameters
+    """
+    config_file = os.path.join(config_dir, f"{consensus_type}_config.json")
+    with open(config_file, 'rb') as f:
+        config = serde.loads(f.read())
+    
+    # Also load network config
+    network_config_file = os.path.join(config_dir, "network_config.json")
+    with open(network_config_file, 'rb') as f:
+        network_config = serde.loads(f.read())
+    
+    config['network'].update(network_config)
+    
+    return config
+
+
 def load_config(consensus_type: str, config_dir: str) -> dict:
     """
     Load configuration for the specified consensus type
@@ -54,27 +92,18 @@ def load_config(consensus_type: str, config_dir: str) -> dict:
         config_dir: Directory containing config files
         
     Returns:
-        dict: Configuration parameters
+        dict: Configuration parameters (a private copy the caller may modify)
     """
     config_file = os.path.join(config_dir, f"{consensus_type}_config.json")
     
     try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-        
-        # Also load network config
-        network_config_file = os.path.join(config_dir, "network_config.json")
-        with open(network_config_file, 'r') as f:
-            network_config = json.load(f)
-        
-        config['network'].update(network_config)
-        
-        return config
+        config = _load_config_cached(consensus_type, os.path.normpath(config_dir))
+        return copy.deepcopy(config)
         
     except FileNotFoundError:
         print(f"Error: Configuration file {config_file} not found")
         sys.exit(1)
-    except json.JSONDecodeError:
+    except serde.JSONDecodeError:
         print(f"Error: Invalid JSON in configuration file {config_file}")
         sys.exit(1)
 
@@ -90,19 +119,28 @@ def setup_logging(node_id: int, log_level: str):
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
     
-    # Setup logging
+    # Setup logging: records go through a queue so file/console writes
+    # happen on the listener thread instead of the caller's
     log_file = f'logs/node_{node_id}.log'
-    logging.basicConfig(
-        level=getattr(logging, log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    output_handlers = [
+        logging.FileHandler(log_file),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in output_handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, *output_handlers)
+    listener.start()
+    atexit.register(listener.stop)  # Drain queued records on shutdown
+    
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, log_level))
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     logger = logging.getLogger(f'node_{node_id}')
-    logger.info(f"Starting socket-based blockchain node {node_id}")
+    logger.info("Starting socket-based blockchain node %s", node_id)
     
     return logger
 
@@ -133,45 +171,59 @@ class SocketSimulator:
         
         # Simulation state
         self.is_running = False
-        self.start_time = None
+        
+        # Outgoing transactions, flushed to peers as one batch message. With the
+        # default generation schedule (one draw every 3s) a batch almost always
+        # holds a single transaction; the short window only pays off at higher
+        # rates, and keeps broadcast latency far below the block time otherwise
+        tx_config = config.get('transactions', {})
+        self._tx_outbox: List[Transaction] = []
+        self.outbox_flush_interval = tx_config.get('batch_flush_ms', 20) / 1000.0
+        self.outbox_max_batch = tx_config.get('max_batch_size', 32)  # Flush early once this many are queued
         
         # Logger
         self.logger = logging.getLogger(f'simulator_{node_id}')
         
-        # Set random seed for deterministic behavior
-        import random
-        random.seed(seed)
+        # Precompute the transaction schedule from the seed for deterministic replays
+        self._rng = random.Random(seed)
+        self._tx_schedule = self._build_tx_schedule(self.duration // 3 + 10)
+        
+        self.logger.info("Socket simulator initialized for node %s", node_id)
+        self.logger.info("Consensus: %s, Scenario: %s, Seed: %s", consensus_type, scenario_type, seed)
+    
+    def _build_tx_schedule(self, length: int) -> List[Tuple[bool, str, float]]:
+        """
+        Draw the transaction generation schedule up front
         
-        self.logger.info(f"Socket simulator initialized for node {node_id}")
-        self.logger.info(f"Consensus: {consensus_type}, Scenario: {scenario_type}, Seed: {seed}")
+        Args:
+            length: Number of generation ticks to draw
+            
+        Returns:
+            List[Tuple[bool, str, float]]: (send?, receiver, amount) per tick
+        """
+        receivers = [str(i) for i in range(5) if str(i) != self.node_id]
+        schedule = []
+        for _ in range(length):
+            should_send = self._rng.random() < 0.3  # 30% chance
+            receiver = self._rng.choice(receivers)  # Random receiver (not self)
+            amount = round(self._rng.uniform(1.0, 10.0), 2)
+            schedule.append((should_send, receiver, amount))
+        return schedule
     
     def run(self) -> None:
         """Run the socket-based simulation"""
         try:
             self.logger.info("Starting socket simulation...")
-            self.start_time = time.time()
             self.is_running = True
             
             # Start the node
             self.node.start()
             
-            # Apply scenario effects
-            self._apply_scenario()
-            
-            # Start transaction generation
-            import threading
-            tx_thread = threading.Thread(target=self._transaction_generation_loop, daemon=True)
-            tx_thread.start()
-            
-            # Start monitoring
-            monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            monitor_thread.start()
-            
-            # Main simulation loop
-            self._main_loop()
+            # Run the scenario and the tick scheduler on one event loop
+            asyncio.run(self._run_async())
             
         except Exception as e:
-            self.logger.error(f"Socket simulation error: {e}")
+            self.logger.error("Socket simulation error: %s", e)
             raise
         finally:
             self.cleanup()
@@ -185,79 +237,126 @@ class SocketSimulator:
         
         self.logger.info("Socket simulation cleanup completed")
     
-    def _apply_scenario(self) -> None:
+    async def _run_async(self) -> None:
+        """Run the simulation until the duration elapses"""
+        scenario = asyncio.ensure_future(self._apply_scenario())
+        try:
+            await self._scheduler_loop()
+        finally:
+            scenario.cancel()
+            await asyncio.gather(scenario, return_exceptions=True)
+            self._flush_outbox()
+    
+    async def _scheduler_loop(self) -> None:
+        """
+        Drive the main, monitor, transaction and outbox ticks from one loop
+        
+        Each tick keeps a time.monotonic() deadline and the loop sleeps until
+        the earliest one, so ticks that fall due together share one wakeup.
+        """
+        started = time.monotonic()
+        end_deadline = started + self.duration
+        next_monitor = started
+        next_tx = started
+        next_flush = None  # Only armed while the outbox has transactions
+        tx_schedule = itertools.cycle(self._tx_schedule)
+        
+        while self.is_running:
+            now = time.monotonic()
+            if now >= end_deadline:
+                self.logger.info("Simulation completed after %.2f seconds", now - started)
+                break
+            
+            if now >= next_monitor:
+                next_monitor = max(next_monitor + self._monitor_tick(), now)
+            
+            if now >= next_tx:
+                self._generate_transaction(*next(tx_schedule))
+                next_tx = max(next_tx + 3.0, now)  # Generate transactions every 3 seconds
+            
+            if self._tx_outbox:
+                if next_flush is None:
+                    next_flush = now + self.outbox_flush_interval
+                elif now >= next_flush:
+                    try:
+                        self._flush_outbox()
+                    except Exception as e:
+                        self.logger.error("Transaction flush error: %s", e)
+                    next_flush = None
+            
+            deadlines = [end_deadline, next_monitor, next_tx]
+            if next_flush is not None:
+                deadlines.append(next_flush)
+            await asyncio.sleep(max(0.0, min(deadlines) - time.monotonic()))
+    
+    def _flush_outbox(self) -> None:
+        """Broadcast all queued transactions as a single batch"""
+        if not self._tx_outbox:
+            return
+        
+        batch = self._tx_outbox
+        self._tx_outbox = []
+        self.node.broadcast_transactions(batch)
+    
+    async def _apply_scenario(self) -> None:
         """Apply scenario-specific network conditions"""
         if self.scenario_type == 'partition':
             # Apply network partition after 10 seconds
-            import threading
-            def apply_partition():
-                time.sleep(10)
+            await asyncio.sleep(10)
+            if self.is_running:
+                # Simple partition: nodes 0,1 vs nodes 2,3,4
+                node_id_int = int(self.node_id)
+                if node_id_int <= 1:
+                    allowed_peers = {'0', '1'}
+                else:
+                    allowed_peers = {'2', '3', '4'}
+                
+                self.node.set_partition(allowed_peers)
+                self.logger.info("Applied network partition: %s", allowed_peers)
+                
+                # Heal partition after 15 more seconds
+                await asyncio.sleep(15)
                 if self.is_running:
-                    # Simple partition: nodes 0,1 vs nodes 2,3,4
-                    node_id_int = int(self.node_id)
-                    if node_id_int <= 1:
-                        allowed_peers = {'0', '1'}
-                    else:
-                        allowed_peers = {'2', '3', '4'}
-                    
-                    self.node.set_partition(allowed_peers)
-                    self.logger.info(f"Applied network partition: {allowed_peers}")
-                    
-                    # Heal partition after 15 more seconds
-                    time.sleep(15)
-                    if self.is_running:
-                        self.node.heal_partition()
-                        self.logger.info("Healed network partition")
-            
-            partition_thread = threading.Thread(target=apply_partition, daemon=True)
-            partition_thread.start()
-    
-    def _main_loop(self) -> None:
-        """Main simulation loop"""
-        while self.is_running and self.start_time:
-            elapsed = time.time() - self.start_time
-            if elapsed >= self.duration:
-                self.logger.info(f"Simulation completed after {elapsed:.2f} seconds")
-                break
-            
-            time.sleep(1.0)
+                    self.node.heal_partition()
+                    self.logger.info("Healed network partition")
     
-    def _monitor_loop(self) -> None:
-        """Background monitoring loop"""
-        while self.is_running:
-            try:
-                info = self.node.get_blockchain_info()
-                self.logger.info(f"Blockchain state: {info}")
-                time.sleep(5.0)  # Monitor every 5 seconds to reduce log noise
-            except Exception as e:
-                self.logger.error(f"Monitor error: {e}")
-                time.sleep(2.0)
-    
-    def _transaction_generation_loop(self) -> None:
-        """Background transaction generation loop"""
-        import random
+    def _monitor_tick(self) -> float:
+        """
+        Log the current blockchain state
         
-        while self.is_running:
-            try:
-                # Generate transaction occasionally
-                if random.random() < 0.3:  # 30% chance
-                    # Pick random receiver (not self)
-                    receivers = [str(i) for i in range(5) if str(i) != self.node_id]
-                    if receivers:
-                        receiver = random.choice(receivers)
-                        amount = round(random.uniform(1.0, 10.0), 2)
-                        
-                        # Check if we have sufficient balance
-                        if self.node.get_balance() >= amount:
-                            tx = self.node.create_transaction(receiver, amount)
-                            if tx:
-                                self.node.broadcast_transaction(tx)
-                                self.logger.info(f"Generated transaction: {amount} to {receiver}")
-                
-                time.sleep(3.0)  # Generate transactions every 3 seconds
-            except Exception as e:
-                self.logger.error(f"Transaction generation error: {e}")
-                time.sleep(3.0)
+        Returns:
+            float: Seconds until the next monitor tick
+        """
+        try:
+            info = self.node.get_blockchain_info()
+            self.logger.info("Blockchain state: %s", info)
+            return 5.0  # Monitor every 5 seconds to reduce log noise
+        except Exception as e:
+            self.logger.error("Monitor error: %s", e)
+            return 2.0
+    
+    def _generate_transaction(self, should_send: bool, receiver: str, amount: float) -> None:
+        """
+        Run one transaction generation tick from the precomputed schedule
+        
+        Args:
+            should_send: Whether this tick sends a transaction
+            receiver: Receiving node ID
+            amount: Amount to send
+        """
+        try:
+            # Generate transaction occasionally
+            if should_send:
+                # Check if we have sufficient balance
+                if self.node.get_balance() >= amount:
+                    tx = self.node.create_transaction(receiver, amount)
+                    if tx:
+                        self._tx_outbox.append(tx)
+                        self.logger.info("Generated transaction: %s to %s", amount, receiver)
+                        if len(self._tx_outbox) >= self.outbox_max_batch:
+                            self._flush_outbox()
+        except Exception as e:
+            self.logger.error("Transaction generation error: %s", e)
 
 
 def signal_handler(signum, frame):
@@ -287,8 +386,8 @@ def main():
         # Update config with command line arguments
         config['simulation']['duration_seconds'] = args.duration
         
-        logger.info(f"Configuration loaded for {args.consensus} consensus")
-        logger.info(f"Running {args.scenario} scenario with seed {args.seed}")
+        logger.info("Configuration loaded for %s consensus", args.consensus)
+        logger.info("Running %s scenario with seed %s", args.scenario, args.seed)
         
         # Create and start socket simulator
         simulator = SocketSimulator(
@@ -307,7 +406,7 @@ def main():
             logger.info("Simulation interrupted by user")
     except Exception as e:
         if logger:
-            logger.error(f"Simulation failed: {e}")
+            logger.error("Simulation failed: %s", e)
         else:
             print(f"Simulation failed: {e}")
         sys.exit(1)
@@ -71,6 +71,9 @@ class ConsensusAlgorithm(ABC):
         """
         Select the best chain from multiple competing chains
         
+        A chain containing an invalid block competes with its valid prefix, so
+        callers may pass only the chains ending at each leaf.
+        
         Args:
             chains: List of competing chains
             
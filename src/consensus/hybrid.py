@@ -3,16 +3,24 @@ Hybrid consensus implementation (Stake-weighted leader selection + Light PoW)
 """
 
 import time
-import random
+import bisect
 import hashlib
+import itertools
 import logging
-import json
-from typing import List, Dict, Optional
+import struct
+from collections import OrderedDict
+from typing import List, Dict, Optional, Sequence, Tuple
 from .base import ConsensusAlgorithm
+from .pow_kernel import NUMBA_AVAILABLE, find_nonce
 from ..core.block import Block
+from ..util.serde import LazyJSON
 from ..core.transaction import Transaction
 
 
+# Little-endian nonce layout matching Block.NONCE_SIZE
+_NONCE_STRUCT = struct.Struct('<Q')
+
+
 class HybridConsensus(ConsensusAlgorithm):
     """
     Hybrid consensus: Stake-weighted leader selection + Light PoW
@@ -27,26 +35,90 @@ class HybridConsensus(ConsensusAlgorithm):
         """
         super().__init__(config)
         self.light_difficulty = config.get('light_difficulty', 2)
-        self.stakes = config.get('stakes', [200, 300, 150, 250, 100])
+        self._set_stake_tables(config.get('stakes', [200, 300, 150, 250, 100]))
         self.leader_timeout_ms = config.get('leader_timeout_ms', 1000)
         
         # Leader failure handling configuration
         self.max_backup_leaders = config.get('max_backup_leaders', 3)
         self.backup_timeout_multiplier = config.get('backup_timeout_multiplier', 0.5)
         
-        # Track height timing for timeout detection
-        self.height_start_times: Dict[int, float] = {}
-        self.height_proposals: Dict[int, List[str]] = {}  # Track who has proposed for each height
+        # Timeouts in integer nanoseconds for time.monotonic_ns() arithmetic
+        self._leader_timeout_ns = int(self.leader_timeout_ms * 1_000_000)
+        self._backup_timeout_ns = int(self._leader_timeout_ns * self.backup_timeout_multiplier)
+        
+        # Light PoW target, precomputed once: the first _pow_prefix_len digest
+        # bytes shifted right by _pow_shift must be zero (light_difficulty nibbles)
+        self._pow_prefix_len = (4 * self.light_difficulty + 7) // 8
+        self._pow_shift = 8 * self._pow_prefix_len - 4 * self.light_difficulty
+        
+        # Track height timing for timeout detection in ring buffers indexed by
+        # height % height_window; a slot is reclaimed when a newer height maps to it
+        self.height_window = config.get('height_window', 1024)
+        self._slot_heights: List[int] = [-1] * self.height_window
+        self._slot_start_times: List[int] = [0] * self.height_window  # time.monotonic_ns()
+        self._slot_proposals: List[List[str]] = [[] for _ in range(self.height_window)]  # Who proposed per height
         
         # Cache leader selections to avoid redundant logging
-        self.leader_cache: Dict[int, int] = {}  # height -> selected_leader
-        self.logged_heights: set = set()  # Track which heights we've logged
-        self.cache_cleanup_interval = 100  # Clean up cache every N heights
+        self.leader_cache: OrderedDict = OrderedDict()  # height -> selected_leader
+        self.leader_cache_size = config.get('leader_cache_size', 4096)
+        self.logged_heights: OrderedDict = OrderedDict()  # Heights already logged, oldest first
+        
+        # Memoized per-block validity for fork choice: (hash, proposer_id) -> bool
+        self._valid_block_cache: OrderedDict = OrderedDict()
+        self.valid_block_cache_size = config.get('valid_block_cache_size', 8192)
+        
+        # Stake-weight of chain prefixes already validated end to end:
+        # (root_hash, tip_hash, tip_proposer_id) -> weight
+        self._valid_prefix_weights: OrderedDict = OrderedDict()
+        
+        # Local node ID, converted to int lazily on first proposal check
+        self._node_id: Optional[str] = None
+        self._node_id_int: Optional[int] = None
         
         # Logging setup
         self.logger = logging.getLogger(f'hybrid_consensus')
         self.log_mode = config.get('logging', {}).get('log_mode', 'structured')  # 'structured' or 'presentation'
     
+    @property
+    def stakes(self) -> Tuple[int, ...]:
+        """
+        Stake per node ID, as a read-only tuple
+        
+        The leader and backup lookup tables are derived from it, so in-place
+        changes are rejected; assign a new sequence to change the stakes.
+        """
+        return self._stake_array
+    
+    @stakes.setter
+    def stakes(self, stakes: Sequence[int]) -> None:
+        """Replace the stakes and drop every result derived from the old ones"""
+        self._set_stake_tables(stakes)
+        self.leader_cache.clear()
+        self.logged_heights.clear()
+        self._valid_block_cache.clear()
+        self._valid_prefix_weights.clear()
+    
+    def _set_stake_tables(self, stakes: Sequence[int]) -> None:
+        """
+        Store the stakes along with their lookup tables
+        
+        Args:
+            stakes: Stake per node ID
+        """
+        self._stake_array = tuple(stakes)
+        
+        # Cumulative stakes for O(log N) weighted leader lookup
+        self._cum_stakes = list(itertools.accumulate(self._stake_array))
+        self._total_stake = self._cum_stakes[-1]
+        
+        # Backup order per primary leader: every other node, highest stake first.
+        # It does not depend on height, so it is built once per stakes vector.
+        num_nodes = len(self._stake_array)
+        by_stake = sorted(range(num_nodes), key=self._stake_array.__getitem__, reverse=True)
+        self._backup_order: List[List[int]] = [
+            [node for node in by_stake if node != primary] for primary in range(num_nodes)
+        ]
+    
     def can_propose_block(self, node_id: str, height: int) -> bool:
         """
         Enhanced block proposal check with leader failure handling
@@ -59,13 +131,12 @@ class HybridConsensus(ConsensusAlgorithm):
             bool: True if node can propose (primary leader or backup after timeout)
         """
         try:
-            node_id_int = int(node_id)
-            current_time = time.time()
+            node_id_int = self._node_int(node_id)
+            current_time = time.monotonic_ns()
             
             # Initialize height timing if not seen before
-            if height not in self.height_start_times:
-                self.height_start_times[height] = current_time
-                self.height_proposals[height] = []
+            slot, _ = self._height_slot(height, current_time)
+            start_time = self._slot_start_times[slot]
             
             # Check if this node is the primary leader
             primary_leader = self.select_leader(height)
@@ -73,17 +144,16 @@ class HybridConsensus(ConsensusAlgorithm):
                 return True
             
             # Check if primary leader has timed out and this node is a backup
-            if self.is_leader_timeout_expired(height, self.height_start_times[height]):
+            time_elapsed = current_time - start_time
+            if time_elapsed > self._leader_timeout_ns:
                 backup_leaders = self.get_backup_leaders(height, primary_leader)
                 
                 # Check if this node is in the backup leader list
                 if node_id_int in backup_leaders:
                     backup_index = backup_leaders.index(node_id_int)
-                    backup_timeout = self.get_backup_timeout(backup_index)
                     
                     # Check if it's this backup's turn (previous backups have also timed out)
-                    time_elapsed = current_time - self.height_start_times[height]
-                    required_time = (self.leader_timeout_ms / 1000.0) + (backup_timeout * backup_index)
+                    required_time = self._leader_timeout_ns + (self._backup_timeout_ns * backup_index)
                     
                     if time_elapsed >= required_time:
                         return True
@@ -93,6 +163,21 @@ class HybridConsensus(ConsensusAlgorithm):
         except (ValueError, IndexError):
             return False
     
+    def _node_int(self, node_id: str) -> int:
+        """
+        Convert a node ID to int, reusing the last conversion
+        
+        Args:
+            node_id: ID of the node
+            
+        Returns:
+            int: Integer node ID
+        """
+        if node_id != self._node_id:
+            self._node_id_int = int(node_id)
+            self._node_id = node_id
+        return self._node_id_int
+    
     def select_leader(self, height: int, seed: int = 42) -> int:
         """
         Select leader using stake-weighted random selection
@@ -108,36 +193,27 @@ class HybridConsensus(ConsensusAlgorithm):
         if height in self.leader_cache:
             return self.leader_cache[height]
         
-        # Use height as seed to ensure deterministic selection
-        # across all nodes for the same height
-        combined_seed = seed + height
-        random.seed(combined_seed)
-        
-        # Calculate total stake
-        total_stake = sum(self.stakes)
+        # Keyed hash of the height gives the same draw on every node for the
+        # same height without touching any RNG state
+        digest = hashlib.blake2b(height.to_bytes(8, 'little'), digest_size=8,
+                                 key=seed.to_bytes(8, 'little')).digest()
+        total_stake = self._total_stake
         
-        # Random selection weighted by stake
-        rand_value = random.randint(1, total_stake)
+        # Random selection weighted by stake (64-bit draw keeps modulo bias negligible)
+        rand_value = int.from_bytes(digest, 'little') % total_stake + 1
+        selected_leader = bisect.bisect_left(self._cum_stakes, rand_value)
         
-        cumulative_stake = 0
-        selected_leader = len(self.stakes) - 1
-        for i, stake in enumerate(self.stakes):
-            cumulative_stake += stake
-            if rand_value <= cumulative_stake:
-                selected_leader = i
-                break
-        
-        # Cache the result
+        # Cache the result, evicting the oldest height once full
         self.leader_cache[height] = selected_leader
+        if len(self.leader_cache) > self.leader_cache_size:
+            self.leader_cache.popitem(last=False)
         
-        # Log leader selection only once per height
+        # Log leader selection only once per height (bounded like the cache)
         if height not in self.logged_heights:
             self._log_leader_selection(height, selected_leader, total_stake, rand_value)
-            self.logged_heights.add(height)
-        
-        # Periodic cache cleanup to prevent memory growth
-        if height % self.cache_cleanup_interval == 0:
-            self._cleanup_old_cache_entries(height)
+            self.logged_heights[height] = None
+            if len(self.logged_heights) > self.leader_cache_size:
+                self.logged_heights.popitem(last=False)
         
         return selected_leader
     
@@ -154,12 +230,11 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             Block: New block with light PoW
         """
-        start_time = time.time()
+        start_time = time.monotonic_ns()
         
         # Track that this node has proposed for this height
-        if height not in self.height_proposals:
-            self.height_proposals[height] = []
-        self.height_proposals[height].append(proposer_id)
+        slot, _ = self._height_slot(height, start_time)
+        self._slot_proposals[slot].append(proposer_id)
         
         # Create block
         block = Block(
@@ -170,63 +245,114 @@ class HybridConsensus(ConsensusAlgorithm):
             nonce=0
         )
         
-        # Add proposer information and current leader context
-        block.proposer_id = proposer_id
-        block.expected_leader = self.get_current_leader(height)
-        block.is_backup_proposal = (int(proposer_id) != self.select_leader(height))
+        # Add proposer information (stored as int for validation) and current leader context
+        block.proposer_id = self._node_int(proposer_id)
+        primary_leader = self.select_leader(height)
+        block.expected_leader = self.get_current_leader(height, primary_leader)
+        block.is_backup_proposal = (block.proposer_id != primary_leader)
         
         # Log block creation start
         self._log_block_creation_start(height, proposer_id, len(transactions), block.is_backup_proposal)
         
-        # Perform light PoW
-        mined_block = self.light_pow(block)
+        # Perform light PoW, timed from the same clock reading
+        mined_block = self.light_pow(block, start_time)
         
         # Log block creation completion
-        creation_time_ms = (time.time() - start_time) * 1000
+        creation_time_ms = (time.monotonic_ns() - start_time) / 1_000_000
         self._log_block_created(mined_block, creation_time_ms)
         
         return mined_block
     
-    def light_pow(self, block: Block) -> Block:
+    def light_pow(self, block: Block, start_time: Optional[int] = None) -> Block:
         """
         Perform lightweight proof of work
         
         Args:
             block: Block to perform light PoW on
+            start_time: time.monotonic_ns() the search deadline counts from;
+                defaults to now
             
         Returns:
             Block: Block with valid light PoW
         """
-        target = "0" * self.light_difficulty
-        pow_start_time = time.time()
+        pow_start_time = time.monotonic_ns() if start_time is None else start_time
+        
+        # Difficulty 0 accepts any digest, so nonce 0 wins without a search
+        if self.light_difficulty <= 0:
+            block.nonce = 0
+            block.hash = block.calculate_hash()
+            block.pow_verified_hash = block.hash
+            pow_time_ms = (time.monotonic_ns() - pow_start_time) / 1_000_000
+            self._log_pow_success(block, 1, pow_time_ms)
+            return block
         
-        nonce = 0
-        attempts = 0
+        # Bound the search by the leader timeout as well as an attempt cap,
+        # so a slow node gives up before its proposal slot has passed
         max_attempts = 100000  # Limited iterations for light PoW
+        deadline = pow_start_time + self._leader_timeout_ns
         
-        while nonce < max_attempts:
+        prefix = block.header_prefix()
+        nonce, attempts = self._search_light_nonce(prefix, max_attempts, deadline)
+        if nonce >= 0:
             block.nonce = nonce
-            block.hash = block.calculate_hash()
-            attempts += 1
-            
-            if block.hash.startswith(target):
-                pow_time_ms = (time.time() - pow_start_time) * 1000
-                self._log_pow_success(block, attempts, pow_time_ms)
-                return block
-            
-            nonce += 1
+            block.hash = block.calculate_hash(prefix)
+            block.pow_verified_hash = block.hash
+            pow_time_ms = (time.monotonic_ns() - pow_start_time) / 1_000_000
+            self._log_pow_success(block, attempts, pow_time_ms)
+            return block
         
         # If we can't find a valid PoW, use a simpler approach for simulation
         # Set nonce to 0 and recalculate hash
         block.nonce = 0
-        block.hash = block.calculate_hash()
+        block.hash = block.calculate_hash(prefix)
+        block.pow_verified_hash = block.hash
         
-        pow_time_ms = (time.time() - pow_start_time) * 1000
+        pow_time_ms = (time.monotonic_ns() - pow_start_time) / 1_000_000
         self._log_pow_timeout(block, attempts, pow_time_ms)
         
         # Return block even if light PoW not complete (for simulation purposes)
         return block
     
+    def _search_light_nonce(self, prefix: bytes, max_attempts: int, deadline: int) -> Tuple[int, int]:
+        """
+        Find the first nonce whose block digest meets the light PoW target
+        
+        Uses the compiled kernel when Numba is installed, otherwise hashes the
+        nonce-free header once and reuses its midstate per attempt, packing
+        each nonce into one reused buffer.
+        
+        Args:
+            prefix: Serialized block header without the nonce
+            max_attempts: Maximum number of nonces to try
+            deadline: time.monotonic_ns() value after which the search stops
+            
+        Returns:
+            Tuple[int, int]: (winning nonce or -1, attempts made)
+        """
+        nonce_size = Block.NONCE_SIZE
+        if NUMBA_AVAILABLE:
+            # The kernel takes a time.monotonic() deadline (same clock, in seconds)
+            return find_nonce(prefix, self.light_difficulty, max_attempts, nonce_size,
+                              deadline / 1_000_000_000)
+        
+        base_hasher = hashlib.sha256(prefix)
+        nonce_slot = bytearray(nonce_size)
+        pack_nonce = _NONCE_STRUCT.pack_into
+        prefix_len = self._pow_prefix_len
+        shift = self._pow_shift
+        from_bytes = int.from_bytes
+        monotonic_ns = time.monotonic_ns
+        for nonce in range(max_attempts):
+            pack_nonce(nonce_slot, 0, nonce)
+            hasher = base_hasher.copy()
+            hasher.update(nonce_slot)
+            if from_bytes(hasher.digest()[:prefix_len], 'big') >> shift == 0:
+                return nonce, nonce + 1
+            # Check the clock periodically rather than on every attempt
+            if nonce & 0x3FFF == 0x3FFF and monotonic_ns() >= deadline:
+                return -1, nonce + 1
+        return -1, max_attempts
+    
     def validate_block(self, block: Block, proposer_id: str) -> bool:
         """
         Enhanced block validation with leader failure handling
@@ -238,11 +364,18 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             bool: True if block is valid
         """
-        validation_start = time.time()
+        validation_start = time.monotonic_ns()
         
-        # Ensure the block has the proposer_id set
-        if not hasattr(block, 'proposer_id') or not block.proposer_id:
+        # Ensure the block has the proposer_id set, normalized to int once here
+        # so chain validation and weighting can compare it directly
+        if block.proposer_id is None:
             block.proposer_id = proposer_id
+        if not isinstance(block.proposer_id, int):
+            try:
+                block.proposer_id = int(block.proposer_id)
+            except (TypeError, ValueError):
+                self._log_validation_failed(block, "invalid_leader", proposer_id)
+                return False
         
         # Validate that the proposer was authorized (including backup scenarios)
         leader_valid = self.validate_leader_selection_with_timeout(block, block.height)
@@ -256,13 +389,7 @@ class HybridConsensus(ConsensusAlgorithm):
             self._log_validation_failed(block, "invalid_pow", proposer_id)
             return False
         
-        # Additional validation: check if block hash is properly calculated
-        calculated_hash = block.calculate_hash()
-        if calculated_hash != block.hash:
-            # For simulation purposes, update the hash if it doesn't match
-            block.hash = calculated_hash
-        
-        validation_time_ms = (time.time() - validation_start) * 1000
+        validation_time_ms = (time.monotonic_ns() - validation_start) / 1_000_000
         self._log_validation_success(block, proposer_id, validation_time_ms)
         
         return True
@@ -278,15 +405,9 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             bool: True if leader selection is valid
         """
-        expected_leader = self.select_leader(height)
-        
         # Check if proposer is stored in block
-        if hasattr(block, 'proposer_id'):
-            try:
-                proposer_id = int(block.proposer_id)
-                return proposer_id == expected_leader
-            except (ValueError, AttributeError):
-                pass
+        if block.proposer_id is not None:
+            return block.proposer_id == self.select_leader(height)
         
         # If proposer not stored, we can't validate (assume valid for now)
         return True
@@ -302,30 +423,26 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             bool: True if leader selection is valid (including backup scenarios)
         """
-        if not hasattr(block, 'proposer_id'):
+        if block.proposer_id is None:
             return True  # Can't validate without proposer info
         
-        try:
-            proposer_id = int(block.proposer_id)
-            primary_leader = self.select_leader(height)
-            
-            # Check if proposer is primary leader
-            if proposer_id == primary_leader:
-                return True
-            
-            # Check if proposer is a valid backup leader
-            backup_leaders = self.get_backup_leaders(height, primary_leader)
-            if proposer_id in backup_leaders:
-                # For simulation purposes, we accept backup proposals
-                # In production, you would validate timing constraints here
-                return True
-            
-            # For now, allow any node to propose to avoid validation failures
-            # This is a temporary fix for the simulation
+        proposer_id = block.proposer_id
+        primary_leader = self.select_leader(height)
+        
+        # Check if proposer is primary leader
+        if proposer_id == primary_leader:
             return True
-            
-        except (ValueError, AttributeError):
-            return True  # Can't validate, assume valid
+        
+        # Check if proposer is a valid backup leader
+        backup_leaders = self.get_backup_leaders(height, primary_leader)
+        if proposer_id in backup_leaders:
+            # For simulation purposes, we accept backup proposals
+            # In production, you would validate timing constraints here
+            return True
+        
+        # For now, allow any node to propose to avoid validation failures
+        # This is a temporary fix for the simulation
+        return True
     
     def validate_light_pow(self, block: Block) -> bool:
         """
@@ -337,29 +454,45 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             bool: True if light PoW is valid
         """
-        target = "0" * self.light_difficulty
+        # Skip rehashing a block whose current hash was already verified
+        if block.pow_verified_hash is not None and block.pow_verified_hash == block.hash:
+            return True
         
         # Recalculate hash
-        calculated_hash = block.calculate_hash()
+        digest = block.calculate_hash_bytes()
         
         # Check if the calculated hash matches the stored hash
-        if calculated_hash != block.hash:
+        if digest.hex() != block.hash:
             return False
+        block.pow_verified_hash = block.hash
             
         # Check if the hash meets the difficulty requirement
-        if not block.hash.startswith(target):
+        if not self._meets_light_target(digest):
             # For simulation purposes, we'll be more lenient with PoW validation
             # In production, this would be strict
             return True  # Temporarily allow blocks that don't meet full PoW
             
         return True
     
+    def _meets_light_target(self, digest: bytes) -> bool:
+        """
+        Check that a raw digest starts with light_difficulty zero nibbles
+        
+        Args:
+            digest: Raw SHA256 digest
+            
+        Returns:
+            bool: True if the digest meets the light PoW target
+        """
+        return int.from_bytes(digest[:self._pow_prefix_len], 'big') >> self._pow_shift == 0
+    
     def select_best_chain(self, chains: List[List[Block]]) -> List[Block]:
         """
         Select chain with highest cumulative stake-weight
         
         Args:
-            chains: List of competing chains
+            chains: List of competing chains; one with an invalid block competes
+                with the prefix before it
             
         Returns:
             List[Block]: Best chain by stake-weight
@@ -367,62 +500,121 @@ class HybridConsensus(ConsensusAlgorithm):
         if not chains:
             return []
         
-        # Filter valid chains and calculate weights
-        valid_chains = []
+        # Single pass over valid prefixes, validating and weighing each together:
+        # highest weight wins, ties broken by length, then tip hash
+        best_chain = None
+        best_key = None
         for chain in chains:
-            if self._is_valid_chain(chain):
-                weight = self.calculate_chain_weight(chain)
-                valid_chains.append((chain, weight))
-        
-        if not valid_chains:
-            return chains[0] if chains else []
-        
-        # Select chain with highest weight (ties broken by length, then hash)
-        best_chain = max(valid_chains, 
-                        key=lambda x: (x[1], len(x[0]), x[0][-1].hash if x[0] else ""))
-        
-        return best_chain[0]
+            valid_length, weight = self._validate_and_weigh(chain)
+            key = (weight, valid_length, chain[valid_length - 1].hash if valid_length else "")
+            if best_key is None or key > best_key:
+                best_key = key
+                best_chain = chain
+        
+        if best_chain is None:
+            return chains[0]
+        
+        # Copy only the winner if it had to be cut back to its valid prefix
+        valid_length = best_key[1]
+        return best_chain if valid_length == len(best_chain) else best_chain[:valid_length]
     
     def _is_valid_chain(self, chain: List[Block]) -> bool:
         """Validate an entire chain according to hybrid rules"""
-        for i, block in enumerate(chain):
-            if i == 0:
-                # Genesis block
-                continue
+        return self._validate_and_weigh(chain)[0] == len(chain)
+    
+    def _validate_and_weigh(self, chain: List[Block]) -> Tuple[int, float]:
+        """
+        Validate a chain up to its first invalid block and weigh that prefix
+        
+        Args:
+            chain: Chain to validate
+            
+        Returns:
+            Tuple[int, float]: (length of the valid prefix, its total stake-weight)
+        """
+        if not chain:
+            return 0, 0.0
+        
+        # Resume after the longest prefix already validated end to end. A cached
+        # tip only counts at the position its height implies from the root.
+        prefixes = self._valid_prefix_weights
+        root = chain[0]
+        root_hash = root.hash
+        start = len(chain) - 1
+        total_weight = None
+        while start > 0:
+            block = chain[start]
+            if block.height - root.height == start:
+                total_weight = prefixes.get((root_hash, block.hash, block.proposer_id))
+                if total_weight is not None:
+                    break
+            start -= 1
+        
+        stake_array = self._stake_array
+        num_stakes = len(stake_array)
+        if total_weight is None:
+            # Genesis block: not validated, but counted like calculate_chain_weight
+            total_weight = 1.0 if root.proposer_id is None else float(
+                stake_array[root.proposer_id] if 0 <= root.proposer_id < num_stakes else 0)
+        
+        cache = self._valid_block_cache
+        for i in range(start + 1, len(chain)):
+            block = chain[i]
             
             # Check block linking
             if block.prev_hash != chain[i-1].hash:
-                return False
-            
-            # Check hybrid consensus rules
-            if not self.validate_light_pow(block):
-                return False
+                return i, total_weight
+            
+            # Check hybrid consensus rules, reusing earlier verdicts for shared prefixes.
+            # proposer_id is part of the key because it is not covered by the block hash.
+            proposer_id = block.proposer_id
+            key = (block.hash, proposer_id)
+            is_valid = cache.get(key)
+            if is_valid is None:
+                is_valid = (self.validate_light_pow(block) and
+                            self.validate_leader_selection(block, block.height))
+                cache[key] = is_valid
+                if len(cache) > self.valid_block_cache_size:
+                    cache.popitem(last=False)
+            
+            if not is_valid:
+                return i, total_weight
+            
+            if proposer_id is not None:
+                if 0 <= proposer_id < num_stakes:
+                    total_weight += stake_array[proposer_id]
+            else:
+                # If no proposer info, assume minimal weight
+                total_weight += 1.0
             
-            if not self.validate_leader_selection(block, block.height):
-                return False
+            prefixes[(root_hash, block.hash, proposer_id)] = total_weight
+            if len(prefixes) > self.valid_block_cache_size:
+                prefixes.popitem(last=False)
         
-        return True
+        return len(chain), total_weight
     
     def calculate_chain_weight(self, chain: List[Block]) -> float:
         """
         Calculate cumulative stake-weight of a chain
         
+        Uses the same per-block weights as _validate_and_weigh, without
+        validating or caching anything.
+        
         Args:
             chain: Chain to calculate weight for
             
         Returns:
             float: Total stake-weight
         """
+        stake_array = self._stake_array
+        num_stakes = len(stake_array)
         total_weight = 0.0
         
         for block in chain:
-            if hasattr(block, 'proposer_id'):
-                try:
-                    proposer_id = int(block.proposer_id)
-                    stake = self.get_stake(proposer_id)
-                    total_weight += stake
-                except (ValueError, IndexError):
-                    pass
+            proposer_id = block.proposer_id
+            if proposer_id is not None:
+                if 0 <= proposer_id < num_stakes:
+                    total_weight += stake_array[proposer_id]
             else:
                 # If no proposer info, assume minimal weight
                 total_weight += 1.0
@@ -439,23 +631,23 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             int: Stake amount
         """
-        if 0 <= node_id < len(self.stakes):
-            return self.stakes[node_id]
+        stake_array = self._stake_array
+        if 0 <= node_id < len(stake_array):
+            return stake_array[node_id]
         return 0
     
-    def is_leader_timeout_expired(self, height: int, start_time: float) -> bool:
+    def is_leader_timeout_expired(self, height: int, start_time: int) -> bool:
         """
         Check if leader timeout has expired for a height
         
         Args:
             height: Block height
-            start_time: Time when height started
+            start_time: time.monotonic_ns() when height started
             
         Returns:
             bool: True if timeout expired
         """
-        timeout_seconds = self.leader_timeout_ms / 1000.0
-        return (time.time() - start_time) > timeout_seconds
+        return (time.monotonic_ns() - start_time) > self._leader_timeout_ns
     
     def get_backup_leaders(self, height: int, primary_leader: int) -> List[int]:
         """
@@ -468,20 +660,10 @@ class HybridConsensus(ConsensusAlgorithm):
         Returns:
             List[int]: Ordered list of backup leader IDs
         """
-        # Create a deterministic but different seed for backup selection
-        backup_seed = hash(f"backup_{height}_{primary_leader}") % 1000000
-        random.seed(backup_seed)
-        
-        # Get all nodes except primary leader
-        available_nodes = [i for i in range(len(self.stakes)) if i != primary_leader]
-        
-        # Sort by stake (higher stake = higher priority as backup)
-        available_nodes.sort(key=lambda x: self.stakes[x], reverse=True)
-        
-        # Take up to max_backup_leaders
-        return available_nodes[:self.max_backup_leaders]
+        # Take up to max_backup_leaders from the precomputed stake order
+        return self._backup_order[primary_leader][:self.max_backup_leaders]
     
-    def get_backup_timeout(self, backup_index: int) -> float:
+    def get_backup_timeout(self, backup_index: int) -> int:
         """
         Calculate timeout for backup leader at given index
         
@@ -489,76 +671,78 @@ class HybridConsensus(ConsensusAlgorithm):
             backup_index: Index of backup leader (0 = first backup, 1 = second, etc.)
             
         Returns:
-            float: Timeout in seconds for this backup
+            int: Timeout in nanoseconds for this backup
         """
-        base_timeout = self.leader_timeout_ms / 1000.0
-        return base_timeout * self.backup_timeout_multiplier
+        return self._backup_timeout_ns
     
-    def get_current_leader(self, height: int) -> int:
+    def get_current_leader(self, height: int, primary_leader: Optional[int] = None) -> int:
         """
         Get the current active leader for a height (considering timeouts)
         
         Args:
             height: Block height
+            primary_leader: select_leader(height), if the caller already has it
             
         Returns:
             int: ID of current active leader
         """
-        current_time = time.time()
+        current_time = time.monotonic_ns()
+        if primary_leader is None:
+            primary_leader = self.select_leader(height)
         
-        if height not in self.height_start_times:
-            self.height_start_times[height] = current_time
-            return self.select_leader(height)
+        slot, is_new = self._height_slot(height, current_time)
+        if is_new:
+            return primary_leader
         
-        start_time = self.height_start_times[height]
-        primary_leader = self.select_leader(height)
+        time_elapsed = current_time - self._slot_start_times[slot]
         
         # Check if primary leader timeout has expired
-        if not self.is_leader_timeout_expired(height, start_time):
+        if time_elapsed <= self._leader_timeout_ns:
             return primary_leader
         
-        # Check which backup leader should be active
+        # Each backup gets an equal window after the primary timeout, so the
+        # active one is the number of whole windows elapsed since then
         backup_leaders = self.get_backup_leaders(height, primary_leader)
-        time_elapsed = current_time - start_time
-        primary_timeout = self.leader_timeout_ms / 1000.0
+        if not backup_leaders:
+            return primary_leader
         
-        for i, backup_leader in enumerate(backup_leaders):
-            backup_timeout = self.get_backup_timeout(i)
-            required_time = primary_timeout + (backup_timeout * (i + 1))
-            
-            if time_elapsed < required_time:
-                return backup_leader
+        last_index = len(backup_leaders) - 1
+        backup_timeout = self._backup_timeout_ns
+        if backup_timeout <= 0:
+            return backup_leaders[last_index]
         
-        # If all backups have timed out, return the last backup
-        return backup_leaders[-1] if backup_leaders else primary_leader
+        # If all backups have timed out, stay on the last backup
+        backup_index = (time_elapsed - self._leader_timeout_ns) // backup_timeout
+        return backup_leaders[min(backup_index, last_index)]
     
-    def _cleanup_old_cache_entries(self, current_height: int) -> None:
-        """Clean up old cache entries to prevent memory growth"""
-        # Keep only recent heights (last 50 heights)
-        cutoff_height = max(0, current_height - 50)
-        
-        # Clean up leader cache
-        heights_to_remove = [h for h in self.leader_cache.keys() if h < cutoff_height]
-        for h in heights_to_remove:
-            del self.leader_cache[h]
-        
-        # Clean up logged heights
-        self.logged_heights = {h for h in self.logged_heights if h >= cutoff_height}
+    def _height_slot(self, height: int, current_time: int) -> Tuple[int, bool]:
+        """
+        Find the ring buffer slot tracking a height, claiming it on first sight
         
-        # Clean up timing data
-        heights_to_remove = [h for h in self.height_start_times.keys() if h < cutoff_height]
-        for h in heights_to_remove:
-            del self.height_start_times[h]
-            if h in self.height_proposals:
-                del self.height_proposals[h]
+        Args:
+            height: Block height
+            current_time: time.monotonic_ns() to record if the height is new
+            
+        Returns:
+            Tuple[int, bool]: (slot index, True if the height was just started)
+        """
+        slot = height % self.height_window
+        if self._slot_heights[slot] != height:
+            self._slot_heights[slot] = height
+            self._slot_start_times[slot] = current_time
+            self._slot_proposals[slot].clear()
+            return slot, True
+        return slot, False
     
     # ======================== LOGGING METHODS ========================
     
     def _log_leader_selection(self, height: int, selected_leader: int, total_stake: int, rand_value: int) -> None:
         """Log leader selection event"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
             stake_percentage = (self.stakes[selected_leader] / total_stake) * 100
-            self.logger.info(f"🎯 HEIGHT {height}: Leader Node-{selected_leader} selected (stake: {self.stakes[selected_leader]}/{total_stake} = {stake_percentage:.1f}%)")
+            self.logger.info("🎯 HEIGHT %s: Leader Node-%s selected (stake: %s/%s = %.1f%%)", height, selected_leader, self.stakes[selected_leader], total_stake, stake_percentage)
         else:
             event_data = {
                 "event": "leader_selection",
@@ -570,13 +754,15 @@ class HybridConsensus(ConsensusAlgorithm):
                 "stake_percentage": (self.stakes[selected_leader] / total_stake) * 100,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_block_creation_start(self, height: int, proposer_id: str, tx_count: int, is_backup: bool) -> None:
         """Log block creation start"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
             role = "BACKUP" if is_backup else "PRIMARY"
-            self.logger.info(f"⚡ HEIGHT {height}: Node-{proposer_id} ({role}) creating block with {tx_count} transactions")
+            self.logger.info("⚡ HEIGHT %s: Node-%s (%s) creating block with %s transactions", height, proposer_id, role, tx_count)
         else:
             event_data = {
                 "event": "block_creation_start",
@@ -586,12 +772,14 @@ class HybridConsensus(ConsensusAlgorithm):
                 "is_backup_proposal": is_backup,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_block_created(self, block: Block, creation_time_ms: float) -> None:
         """Log successful block creation"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"✅ HEIGHT {block.height}: Block created by Node-{block.proposer_id} in {creation_time_ms:.1f}ms (hash: {block.hash[:12]}...)")
+            self.logger.info("✅ HEIGHT %s: Block created by Node-%s in %.1fms (hash: %s...)", block.height, block.proposer_id, creation_time_ms, block.hash[:12])
         else:
             event_data = {
                 "event": "block_created",
@@ -601,15 +789,17 @@ class HybridConsensus(ConsensusAlgorithm):
                 "creation_time_ms": creation_time_ms,
                 "nonce": block.nonce,
                 "transaction_count": len(block.transactions),
-                "is_backup_proposal": getattr(block, 'is_backup_proposal', False),
+                "is_backup_proposal": block.is_backup_proposal,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_pow_success(self, block: Block, attempts: int, pow_time_ms: float) -> None:
         """Log successful PoW completion"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"⛏️  HEIGHT {block.height}: Light PoW solved in {attempts} attempts ({pow_time_ms:.1f}ms)")
+            self.logger.info("⛏️  HEIGHT %s: Light PoW solved in %s attempts (%.1fms)", block.height, attempts, pow_time_ms)
         else:
             event_data = {
                 "event": "light_pow_success",
@@ -621,12 +811,14 @@ class HybridConsensus(ConsensusAlgorithm):
                 "hash": block.hash,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_pow_timeout(self, block: Block, attempts: int, pow_time_ms: float) -> None:
         """Log PoW timeout"""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         if self.log_mode == 'presentation':
-            self.logger.warning(f"⏰ HEIGHT {block.height}: Light PoW timeout after {attempts} attempts ({pow_time_ms:.1f}ms)")
+            self.logger.warning("⏰ HEIGHT %s: Light PoW timeout after %s attempts (%.1fms)", block.height, attempts, pow_time_ms)
         else:
             event_data = {
                 "event": "light_pow_timeout",
@@ -636,12 +828,14 @@ class HybridConsensus(ConsensusAlgorithm):
                 "difficulty": self.light_difficulty,
                 "timestamp": time.time()
             }
-            self.logger.warning(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.warning("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_validation_success(self, block: Block, proposer_id: str, validation_time_ms: float) -> None:
         """Log successful block validation"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"✅ HEIGHT {block.height}: Block from Node-{proposer_id} validated in {validation_time_ms:.1f}ms")
+            self.logger.info("✅ HEIGHT %s: Block from Node-%s validated in %.1fms", block.height, proposer_id, validation_time_ms)
         else:
             event_data = {
                 "event": "block_validation_success",
@@ -651,13 +845,15 @@ class HybridConsensus(ConsensusAlgorithm):
                 "validation_time_ms": validation_time_ms,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_validation_failed(self, block: Block, reason: str, proposer_id: str) -> None:
         """Log failed block validation"""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         if self.log_mode == 'presentation':
             reason_text = {"invalid_leader": "unauthorized proposer", "invalid_pow": "invalid PoW"}.get(reason, reason)
-            self.logger.warning(f"❌ HEIGHT {block.height}: Block from Node-{proposer_id} rejected ({reason_text})")
+            self.logger.warning("❌ HEIGHT %s: Block from Node-%s rejected (%s)", block.height, proposer_id, reason_text)
         else:
             event_data = {
                 "event": "block_validation_failed",
@@ -667,32 +863,36 @@ class HybridConsensus(ConsensusAlgorithm):
                 "failure_reason": reason,
                 "timestamp": time.time()
             }
-            self.logger.warning(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.warning("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_partition_event(self, event_type: str, partition_info: dict) -> None:
         """Log partition-related events"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
             if event_type == 'partition_start':
-                self.logger.info(f"🌐 NETWORK PARTITION: Network split detected")
+                self.logger.info("🌐 NETWORK PARTITION: Network split detected")
             elif event_type == 'partition_heal':
-                self.logger.info(f"🔗 NETWORK HEAL: Partitions reconnecting")
+                self.logger.info("🔗 NETWORK HEAL: Partitions reconnecting")
             elif event_type == 'chain_reorganization':
-                self.logger.info(f"🔄 CHAIN REORG: Switching to higher stake-weight chain")
+                self.logger.info("🔄 CHAIN REORG: Switching to higher stake-weight chain")
             elif event_type == 'fork_resolution':
                 winner = partition_info.get('winning_chain', 'unknown')
-                self.logger.info(f"🏆 FORK RESOLVED: Chain {winner} wins (highest stake-weight)")
+                self.logger.info("🏆 FORK RESOLVED: Chain %s wins (highest stake-weight)", winner)
         else:
             event_data = {
                 "event": f"partition_{event_type}",
                 "partition_info": partition_info,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
     
     def _log_stake_weight_comparison(self, chain_a_weight: float, chain_b_weight: float, winner: str) -> None:
         """Log stake weight comparison for chain selection"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"⚖️  STAKE WEIGHT: Chain A: {chain_a_weight:.1f} vs Chain B: {chain_b_weight:.1f} → Winner: {winner}")
+            self.logger.info("⚖️  STAKE WEIGHT: Chain A: %.1f vs Chain B: %.1f → Winner: %s", chain_a_weight, chain_b_weight, winner)
         else:
             event_data = {
                 "event": "stake_weight_comparison",
@@ -701,4 +901,4 @@ class HybridConsensus(ConsensusAlgorithm):
                 "winner": winner,
                 "timestamp": time.time()
             }
-            self.logger.info(f"HYBRID_EVENT: {json.dumps(event_data)}")
+            self.logger.info("HYBRID_EVENT: %s", LazyJSON(event_data))
@@ -4,12 +4,19 @@ Proof of Work consensus implementation
 
 import time
 import hashlib
+import itertools
 import logging
-import json
+import struct
 from typing import List, Optional
 from .base import ConsensusAlgorithm
+from .pow_kernel import MAX_NONCE, NUMBA_AVAILABLE, find_nonce
 from ..core.block import Block
 from ..core.transaction import Transaction
+from ..util.serde import LazyJSON
+
+
+# Little-endian nonce layout matching Block.NONCE_SIZE
+_NONCE_STRUCT = struct.Struct('<Q')
 
 
 class ProofOfWork(ConsensusAlgorithm):
@@ -32,6 +39,28 @@ class ProofOfWork(ConsensusAlgorithm):
         self.logger = logging.getLogger(f'pow_consensus')
         self.log_mode = config.get('logging', {}).get('log_mode', 'structured')  # 'structured' or 'presentation'
     
+    @property
+    def difficulty(self) -> int:
+        """Required leading zero hex digits; assign to retarget"""
+        return self._difficulty
+    
+    @difficulty.setter
+    def difficulty(self, difficulty: int) -> None:
+        """Set the difficulty along with its precomputed target forms"""
+        self._difficulty = difficulty
+        self._target = "0" * difficulty
+        
+        # A raw digest has difficulty leading zero hex digits exactly when it is
+        # below 2 ** (256 - 4 * difficulty); equal-length bytes compare like
+        # big-endian integers, so mining tests that with a single bytes compare
+        zero_bits = 4 * difficulty
+        if zero_bits <= 0:
+            self._target_bound = b'\xff' * 33  # Longer than any digest, so above it
+        elif zero_bits <= 256:
+            self._target_bound = (1 << (256 - zero_bits)).to_bytes(32, 'big')
+        else:
+            self._target_bound = bytes(32)  # Unreachable target
+    
     def can_propose_block(self, node_id: str, height: int) -> bool:
         """
         In PoW, any node can propose a block
@@ -58,7 +87,7 @@ class ProofOfWork(ConsensusAlgorithm):
         Returns:
             Block: Mined block
         """
-        start_time = time.time()
+        start_time = time.monotonic_ns()
         
         # Log mining start
         self._log_mining_start(height, proposer_id, len(transactions))
@@ -79,7 +108,7 @@ class ProofOfWork(ConsensusAlgorithm):
         mined_block = self._mine_block_pow(block)
         
         # Log mining completion
-        total_time_ms = (time.time() - start_time) * 1000
+        total_time_ms = (time.monotonic_ns() - start_time) / 1_000_000
         self._log_block_mined(mined_block, total_time_ms)
         
         return mined_block
@@ -94,33 +123,76 @@ class ProofOfWork(ConsensusAlgorithm):
         Returns:
             Block: Mined block with valid proof of work
         """
-        target = self.get_target()
-        start_time = time.time()
-        
-        nonce = 0
-        hash_attempts = 0
-        while True:
-            # Check timeout
-            current_time = time.time()
-            if current_time - start_time > self.max_mining_time:
-                mining_time_ms = (current_time - start_time) * 1000
-                self._log_mining_timeout(block, hash_attempts, mining_time_ms)
-                break
-            
+        target_bound = self._target_bound
+        start_time = time.monotonic_ns()
+        
+        prefix = block.header_prefix()
+        if NUMBA_AVAILABLE:
+            return self._mine_block_compiled(block, prefix, start_time)
+        
+        # Hash the serialized header once and copy its midstate per attempt,
+        # so each attempt only absorbs the nonce bytes
+        base_hasher = hashlib.sha256(prefix)
+        nonce_slot = bytearray(Block.NONCE_SIZE)
+        
+        # Bind everything the loop touches to locals up front
+        deadline = start_time + int(self.max_mining_time * 1_000_000_000)
+        pack_nonce = _NONCE_STRUCT.pack_into
+        copy_hasher = base_hasher.copy
+        monotonic_ns = time.monotonic_ns
+        for nonce in range(MAX_NONCE):
             # Try current nonce
-            block.nonce = nonce
-            block.hash = block.calculate_hash()
-            hash_attempts += 1
+            pack_nonce(nonce_slot, 0, nonce)
+            hasher = copy_hasher()
+            hasher.update(nonce_slot)
+            digest = hasher.digest()
             
-            if block.hash.startswith(target):
+            if digest < target_bound:
                 # Found valid proof of work
-                mining_time_ms = (current_time - start_time) * 1000
-                self._log_mining_success(block, hash_attempts, mining_time_ms)
+                block.nonce = nonce
+                block.hash = digest.hex()
+                block.pow_verified_hash = block.hash
+                mining_time_ms = (monotonic_ns() - start_time) / 1_000_000
+                self._log_mining_success(block, nonce + 1, mining_time_ms)
                 return block
             
-            nonce += 1
+            # Check timeout every 4096 attempts rather than on every attempt
+            if nonce & 0xFFF == 0xFFF:
+                current_time = monotonic_ns()
+                if current_time > deadline:
+                    mining_time_ms = (current_time - start_time) / 1_000_000
+                    self._log_mining_timeout(block, nonce + 1, mining_time_ms)
+                    break
         
-        # Return block even if not fully mined (for simulation purposes)
+        # Return block even if not fully mined (for simulation purposes);
+        # it keeps the nonce 0 hash computed when it was created
+        return block
+    
+    def _mine_block_compiled(self, block: Block, prefix: bytes, start_time: int) -> Block:
+        """
+        Mine a block with the compiled nonce search kernel
+        
+        Args:
+            block: Block to mine
+            prefix: Serialized block header without the nonce
+            start_time: time.monotonic_ns() when mining started
+            
+        Returns:
+            Block: Mined block, left at nonce 0 if the search timed out
+        """
+        # The kernel takes a time.monotonic() deadline (same clock, in seconds)
+        deadline = start_time / 1_000_000_000 + self.max_mining_time
+        nonce, hash_attempts = find_nonce(prefix, self.difficulty, MAX_NONCE,
+                                          Block.NONCE_SIZE, deadline)
+        mining_time_ms = (time.monotonic_ns() - start_time) / 1_000_000
+        if nonce < 0:
+            self._log_mining_timeout(block, hash_attempts, mining_time_ms)
+            return block
+        
+        block.nonce = nonce
+        block.hash = block.calculate_hash(prefix)
+        block.pow_verified_hash = block.hash
+        self._log_mining_success(block, hash_attempts, mining_time_ms)
         return block
     
     def validate_block(self, block: Block, proposer_id: str) -> bool:
@@ -134,9 +206,9 @@ class ProofOfWork(ConsensusAlgorithm):
         Returns:
             bool: True if PoW is valid
         """
-        validation_start = time.time()
+        validation_start = time.monotonic_ns()
         is_valid = self.validate_proof(block)
-        validation_time_ms = (time.time() - validation_start) * 1000
+        validation_time_ms = (time.monotonic_ns() - validation_start) / 1_000_000
         
         if is_valid:
             self._log_validation_success(block, proposer_id, validation_time_ms)
@@ -155,21 +227,38 @@ class ProofOfWork(ConsensusAlgorithm):
         Returns:
             bool: True if PoW is valid
         """
-        target = self.get_target()
+        # A stored hash that misses the target is rejected without rehashing;
+        # one that meets it is valid if it matches the block contents
+        return block.hash.startswith(self._target) and self._hash_matches_contents(block)
+    
+    def _hash_matches_contents(self, block: Block) -> bool:
+        """
+        Check that the block's stored hash is the hash of its contents
         
-        # Recalculate hash to verify
-        calculated_hash = block.calculate_hash()
+        A block whose current hash was already checked is not rehashed.
         
-        # Check if hash matches stored hash and meets difficulty
-        return (calculated_hash == block.hash and 
-                block.hash.startswith(target))
+        Args:
+            block: Block to check
+            
+        Returns:
+            bool: True if the stored hash is correct
+        """
+        if block.pow_verified_hash is not None and block.pow_verified_hash == block.hash:
+            return True
+        
+        # Recalculate hash to verify
+        if block.calculate_hash() != block.hash:
+            return False
+        block.pow_verified_hash = block.hash
+        return True
     
     def select_best_chain(self, chains: List[List[Block]]) -> List[Block]:
         """
         Select the longest valid chain
         
         Args:
-            chains: List of competing chains
+            chains: List of competing chains; one with an invalid block competes
+                with the prefix before it
             
         Returns:
             List[Block]: Longest chain
@@ -177,34 +266,63 @@ class ProofOfWork(ConsensusAlgorithm):
         if not chains:
             return []
         
-        # Filter to only valid chains
-        valid_chains = []
+        # Single pass over valid prefixes: longest wins, ties broken by latest
+        # block hash. Only chains that could beat the current best are validated.
+        best_chain = None
+        best_length = -1
+        best_tip = ""
         for chain in chains:
-            if self._is_valid_chain(chain):
-                valid_chains.append(chain)
+            length = len(chain)
+            if length < best_length:
+                continue
+            tip = chain[-1].hash if chain else ""
+            if length == best_length and tip <= best_tip:
+                continue
+            valid_length = self._valid_prefix_length(chain)
+            if valid_length < length:
+                length = valid_length
+                tip = chain[length - 1].hash if length else ""
+                if length < best_length or (length == best_length and tip <= best_tip):
+                    continue
+            best_chain = chain
+            best_length = length
+            best_tip = tip
         
-        if not valid_chains:
-            return chains[0] if chains else []
+        if best_chain is None:
+            return chains[0]
         
-        # Return longest chain (ties broken by latest block hash)
-        return max(valid_chains, key=lambda chain: (len(chain), chain[-1].hash))
+        # Copy only the winner if it had to be cut back to its valid prefix
+        return best_chain if best_length == len(best_chain) else best_chain[:best_length]
     
     def _is_valid_chain(self, chain: List[Block]) -> bool:
         """Validate an entire chain"""
-        for i, block in enumerate(chain):
-            if i == 0:
-                # Genesis block validation
-                continue
+        return self._valid_prefix_length(chain) == len(chain)
+    
+    def _valid_prefix_length(self, chain: List[Block]) -> int:
+        """
+        Count the leading blocks of a chain that are valid
+        
+        Args:
+            chain: Chain to validate
             
+        Returns:
+            int: Length of the longest valid prefix
+        """
+        target = self._target
+        
+        # Genesis block (index 0) is not validated
+        prev_hash = chain[0].hash if chain else None
+        for i, block in enumerate(itertools.islice(chain, 1, None), 1):
             # Check previous hash links
-            if block.prev_hash != chain[i-1].hash:
-                return False
+            if block.prev_hash != prev_hash:
+                return i
             
-            # Check proof of work
-            if not self.validate_proof(block):
-                return False
+            # Check proof of work: stored hash meets difficulty and matches contents
+            if not (block.hash.startswith(target) and self._hash_matches_contents(block)):
+                return i
+            prev_hash = block.hash
         
-        return True
+        return len(chain)
     
     def get_target(self) -> str:
         """
@@ -213,7 +331,7 @@ class ProofOfWork(ConsensusAlgorithm):
         Returns:
             str: Target string (difficulty number of zeros)
         """
-        return "0" * self.difficulty
+        return self._target
     
     def calculate_difficulty(self, recent_blocks: List[Block]) -> int:
         """
@@ -256,8 +374,10 @@ class ProofOfWork(ConsensusAlgorithm):
     
     def _log_mining_start(self, height: int, proposer_id: str, tx_count: int) -> None:
         """Log mining start event"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"⛏️ HEIGHT {height}: Node-{proposer_id} starting PoW mining (difficulty: {self.difficulty}, txs: {tx_count})")
+            self.logger.info("⛏️ HEIGHT %s: Node-%s starting PoW mining (difficulty: %s, txs: %s)", height, proposer_id, self.difficulty, tx_count)
         else:
             event_data = {
                 "event": "mining_start",
@@ -268,13 +388,15 @@ class ProofOfWork(ConsensusAlgorithm):
                 "target": self.get_target(),
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_mining_success(self, block: Block, attempts: int, mining_time_ms: float) -> None:
         """Log successful mining completion"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        hash_rate = attempts / (mining_time_ms / 1000) if mining_time_ms > 0 else 0
         if self.log_mode == 'presentation':
-            hash_rate = attempts / (mining_time_ms / 1000) if mining_time_ms > 0 else 0
-            self.logger.info(f"✅ HEIGHT {block.height}: PoW solved! Nonce: {block.nonce}, Attempts: {attempts}, Time: {mining_time_ms:.1f}ms ({hash_rate:.0f} H/s)")
+            self.logger.info("✅ HEIGHT %s: PoW solved! Nonce: %s, Attempts: %s, Time: %.1fms (%.0f H/s)", block.height, block.nonce, attempts, mining_time_ms, hash_rate)
         else:
             event_data = {
                 "event": "mining_success",
@@ -284,16 +406,18 @@ class ProofOfWork(ConsensusAlgorithm):
                 "attempts": attempts,
                 "mining_time_ms": mining_time_ms,
                 "difficulty": self.difficulty,
-                "hash_rate": attempts / (mining_time_ms / 1000) if mining_time_ms > 0 else 0,
+                "hash_rate": hash_rate,
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_mining_timeout(self, block: Block, attempts: int, mining_time_ms: float) -> None:
         """Log mining timeout"""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
+        hash_rate = attempts / (mining_time_ms / 1000) if mining_time_ms > 0 else 0
         if self.log_mode == 'presentation':
-            hash_rate = attempts / (mining_time_ms / 1000) if mining_time_ms > 0 else 0
-            self.logger.warning(f"⏰ HEIGHT {block.height}: Mining timeout after {attempts} attempts ({mining_time_ms:.1f}ms, {hash_rate:.0f} H/s)")
+            self.logger.warning("⏰ HEIGHT %s: Mining timeout after %s attempts (%.1fms, %.0f H/s)", block.height, attempts, mining_time_ms, hash_rate)
         else:
             event_data = {
                 "event": "mining_timeout",
@@ -301,32 +425,38 @@ class ProofOfWork(ConsensusAlgorithm):
                 "attempts": attempts,
                 "mining_time_ms": mining_time_ms,
                 "difficulty": self.difficulty,
-                "hash_rate": attempts / (mining_time_ms / 1000) if mining_time_ms > 0 else 0,
+                "hash_rate": hash_rate,
                 "timestamp": time.time()
             }
-            self.logger.warning(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.warning("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_block_mined(self, block: Block, total_time_ms: float) -> None:
         """Log completed block mining"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        # Node 0 is a valid proposer, so only a missing id is unknown
+        proposer_id = block.proposer_id if block.proposer_id is not None else 'unknown'
         if self.log_mode == 'presentation':
-            self.logger.info(f"✨ HEIGHT {block.height}: Block mined by Node-{getattr(block, 'proposer_id', 'unknown')} in {total_time_ms:.1f}ms (hash: {block.hash[:12]}...)")
+            self.logger.info("✨ HEIGHT %s: Block mined by Node-%s in %.1fms (hash: %s...)", block.height, proposer_id, total_time_ms, block.hash[:12])
         else:
             event_data = {
                 "event": "block_mined",
                 "height": block.height,
-                "proposer_id": getattr(block, 'proposer_id', 'unknown'),
+                "proposer_id": proposer_id,
                 "block_hash": block.hash,
                 "total_time_ms": total_time_ms,
                 "nonce": block.nonce,
                 "transaction_count": len(block.transactions),
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_validation_success(self, block: Block, proposer_id: str, validation_time_ms: float) -> None:
         """Log successful block validation"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"✅ HEIGHT {block.height}: Block from Node-{proposer_id} validated in {validation_time_ms:.2f}ms")
+            self.logger.info("✅ HEIGHT %s: Block from Node-%s validated in %.2fms", block.height, proposer_id, validation_time_ms)
         else:
             event_data = {
                 "event": "block_validation_success",
@@ -336,12 +466,14 @@ class ProofOfWork(ConsensusAlgorithm):
                 "validation_time_ms": validation_time_ms,
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_validation_failed(self, block: Block, proposer_id: str, validation_time_ms: float) -> None:
         """Log failed block validation"""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         if self.log_mode == 'presentation':
-            self.logger.warning(f"❌ HEIGHT {block.height}: Block from Node-{proposer_id} rejected (invalid PoW) in {validation_time_ms:.2f}ms")
+            self.logger.warning("❌ HEIGHT %s: Block from Node-%s rejected (invalid PoW) in %.2fms", block.height, proposer_id, validation_time_ms)
         else:
             event_data = {
                 "event": "block_validation_failed",
@@ -352,13 +484,15 @@ class ProofOfWork(ConsensusAlgorithm):
                 "failure_reason": "invalid_pow",
                 "timestamp": time.time()
             }
-            self.logger.warning(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.warning("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_difficulty_adjustment(self, old_difficulty: int, new_difficulty: int, avg_time: float, target_time: float) -> None:
         """Log difficulty adjustment"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
             direction = "increased" if new_difficulty > old_difficulty else "decreased"
-            self.logger.info(f"🎯 Difficulty {direction}: {old_difficulty} → {new_difficulty} (avg block time: {avg_time:.1f}s vs target: {target_time:.1f}s)")
+            self.logger.info("🎯 Difficulty %s: %s → %s (avg block time: %.1fs vs target: %.1fs)", direction, old_difficulty, new_difficulty, avg_time, target_time)
         else:
             event_data = {
                 "event": "difficulty_adjustment",
@@ -369,32 +503,36 @@ class ProofOfWork(ConsensusAlgorithm):
                 "adjustment_ratio": avg_time / target_time if target_time > 0 else 0,
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_partition_event(self, event_type: str, partition_info: dict) -> None:
         """Log partition-related events"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
             if event_type == 'partition_start':
-                self.logger.info(f"🌐 NETWORK PARTITION: Network split detected")
+                self.logger.info("🌐 NETWORK PARTITION: Network split detected")
             elif event_type == 'partition_heal':
-                self.logger.info(f"🔗 NETWORK HEAL: Partitions reconnecting")
+                self.logger.info("🔗 NETWORK HEAL: Partitions reconnecting")
             elif event_type == 'chain_reorganization':
-                self.logger.info(f"🔄 CHAIN REORG: Switching to longest chain")
+                self.logger.info("🔄 CHAIN REORG: Switching to longest chain")
             elif event_type == 'fork_resolution':
                 winner_length = partition_info.get('winning_length', 0)
-                self.logger.info(f"📏 FORK RESOLVED: Longest chain wins (length: {winner_length})")
+                self.logger.info("📏 FORK RESOLVED: Longest chain wins (length: %s)", winner_length)
         else:
             event_data = {
                 "event": f"partition_{event_type}",
                 "partition_info": partition_info,
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_chain_comparison(self, chain_a_length: int, chain_b_length: int, winner: str) -> None:
         """Log chain length comparison for longest chain rule"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
-            self.logger.info(f"📏 CHAIN LENGTH: Chain A: {chain_a_length} vs Chain B: {chain_b_length} → Winner: {winner}")
+            self.logger.info("📏 CHAIN LENGTH: Chain A: %s vs Chain B: %s → Winner: %s", chain_a_length, chain_b_length, winner)
         else:
             event_data = {
                 "event": "chain_length_comparison",
@@ -403,13 +541,15 @@ class ProofOfWork(ConsensusAlgorithm):
                 "winner": winner,
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
     
     def _log_mining_competition(self, active_miners: int, partition_id: str = None) -> None:
         """Log mining competition status"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if self.log_mode == 'presentation':
             partition_text = f" (Partition {partition_id})" if partition_id else ""
-            self.logger.info(f"⛏️  MINING COMPETITION: {active_miners} active miners{partition_text}")
+            self.logger.info("⛏️  MINING COMPETITION: %s active miners%s", active_miners, partition_text)
         else:
             event_data = {
                 "event": "mining_competition",
@@ -417,4 +557,4 @@ class ProofOfWork(ConsensusAlgorithm):
                 "partition_id": partition_id,
                 "timestamp": time.time()
             }
-            self.logger.info(f"POW_EVENT: {json.dumps(event_data)}")
+            self.logger.info("POW_EVENT: %s", LazyJSON(event_data))
@@ -0,0 +1,290 @@
+"""
+Compiled nonce search for PoW and light PoW (optional Numba backend)
+"""
+
+import time
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba is optional; callers fall back to hashlib
+    np = None
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels below stay importable"""
+        def decorator(func):
+            return func
+        return decorator
+
+
+MASK32 = 0xFFFFFFFF
+
+# Largest nonce a search may reach; keeps nonces within the 8-byte nonce width
+MAX_NONCE = 2 ** 63 - 1
+
+# Nonces scanned per kernel call between wallclock deadline checks
+DEADLINE_CHUNK = 16384
+
+# Nonces hashed side by side per compression in the search kernel
+LANES = 8
+
+SHA256_IV = (
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+    0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+)
+
+SHA256_K = (
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+)
+
+
+@njit(cache=True)
+def _rotr(x, n):
+    return ((x >> n) | (x << (32 - n))) & 0xFFFFFFFF
+
+
+@njit(cache=True)
+def _compress(state, data, offset, k, w):
+    """
+    Run one SHA-256 compression over data[offset:offset + 64] in place
+
+    Args:
+        state: Eight 32-bit working words, updated in place
+        data: Message bytes
+        offset: Start of the 64-byte block inside data
+        k: SHA-256 round constants
+        w: Scratch buffer of 64 words for the message schedule
+    """
+    for t in range(16):
+        i = offset + 4 * t
+        w[t] = (data[i] << 24) | (data[i + 1] << 16) | (data[i + 2] << 8) | data[i + 3]
+    for t in range(16, 64):
+        s0 = _rotr(w[t - 15], 7) ^ _rotr(w[t - 15], 18) ^ (w[t - 15] >> 3)
+        s1 = _rotr(w[t - 2], 17) ^ _rotr(w[t - 2], 19) ^ (w[t - 2] >> 10)
+        w[t] = (w[t - 16] + s0 + w[t - 7] + s1) & 0xFFFFFFFF
+
+    a, b, c, d = state[0], state[1], state[2], state[3]
+    e, f, g, h = state[4], state[5], state[6], state[7]
+    for t in range(64):
+        s1 = _rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)
+        ch = (e & f) ^ ((~e) & g & 0xFFFFFFFF)
+        temp1 = (h + s1 + ch + k[t] + w[t]) & 0xFFFFFFFF
+        s0 = _rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)
+        maj = (a & b) ^ (a & c) ^ (b & c)
+        temp2 = (s0 + maj) & 0xFFFFFFFF
+        h, g, f, e = g, f, e, (d + temp1) & 0xFFFFFFFF
+        d, c, b, a = c, b, a, (temp1 + temp2) & 0xFFFFFFFF
+
+    state[0] = (state[0] + a) & 0xFFFFFFFF
+    state[1] = (state[1] + b) & 0xFFFFFFFF
+    state[2] = (state[2] + c) & 0xFFFFFFFF
+    state[3] = (state[3] + d) & 0xFFFFFFFF
+    state[4] = (state[4] + e) & 0xFFFFFFFF
+    state[5] = (state[5] + f) & 0xFFFFFFFF
+    state[6] = (state[6] + g) & 0xFFFFFFFF
+    state[7] = (state[7] + h) & 0xFFFFFFFF
+
+
+@njit(cache=True, boundscheck=False)
+def _compress_lanes(state, messages, message_len, offset, k, w, v):
+    """
+    Run one SHA-256 compression for LANES independent messages at once
+
+    Arrays are laid out lane-minor (index word * LANES + lane) so every inner
+    loop walks contiguous lanes and LLVM can map it onto SIMD registers.
+
+    Args:
+        state: 8 * LANES working words, updated in place
+        messages: LANES * message_len bytes, one padded message per lane
+        message_len: Length of each lane's message
+        offset: Start of the 64-byte block inside each message
+        k: SHA-256 round constants
+        w: Scratch buffer of 64 * LANES words for the message schedules
+        v: Scratch buffer of 8 * LANES words for the round variables
+    """
+    for t in range(16):
+        for lane in range(LANES):
+            i = lane * message_len + offset + 4 * t
+            w[t * LANES + lane] = ((messages[i] << 24) | (messages[i + 1] << 16) |
+                                   (messages[i + 2] << 8) | messages[i + 3])
+    for t in range(16, 64):
+        for lane in range(LANES):
+            w15 = w[(t - 15) * LANES + lane]
+            w2 = w[(t - 2) * LANES + lane]
+            s0 = _rotr(w15, 7) ^ _rotr(w15, 18) ^ (w15 >> 3)
+            s1 = _rotr(w2, 17) ^ _rotr(w2, 19) ^ (w2 >> 10)
+            w[t * LANES + lane] = (w[(t - 16) * LANES + lane] + s0 +
+                                   w[(t - 7) * LANES + lane] + s1) & 0xFFFFFFFF
+
+    for i in range(8 * LANES):
+        v[i] = state[i]
+    for t in range(64):
+        kt = k[t]
+        for lane in range(LANES):
+            a = v[lane]
+            b = v[LANES + lane]
+            c = v[2 * LANES + lane]
+            d = v[3 * LANES + lane]
+            e = v[4 * LANES + lane]
+            f = v[5 * LANES + lane]
+            g = v[6 * LANES + lane]
+            h = v[7 * LANES + lane]
+            s1 = _rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)
+            ch = (e & f) ^ ((~e) & g & 0xFFFFFFFF)
+            temp1 = (h + s1 + ch + kt + w[t * LANES + lane]) & 0xFFFFFFFF
+            s0 = _rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)
+            maj = (a & b) ^ (a & c) ^ (b & c)
+            temp2 = (s0 + maj) & 0xFFFFFFFF
+            v[7 * LANES + lane] = g
+            v[6 * LANES + lane] = f
+            v[5 * LANES + lane] = e
+            v[4 * LANES + lane] = (d + temp1) & 0xFFFFFFFF
+            v[3 * LANES + lane] = c
+            v[2 * LANES + lane] = b
+            v[LANES + lane] = a
+            v[lane] = (temp1 + temp2) & 0xFFFFFFFF
+    for i in range(8 * LANES):
+        state[i] = (state[i] + v[i]) & 0xFFFFFFFF
+
+
+@njit(cache=True)
+def _lane_meets_zero_nibbles(state, lane, difficulty):
+    """Check that one lane's digest starts with difficulty zero nibbles"""
+    bits = 4 * difficulty
+    word = 0
+    while bits >= 32:
+        if state[word * LANES + lane] != 0:
+            return False
+        bits -= 32
+        word += 1
+    if bits == 0:
+        return True
+    return (state[word * LANES + lane] >> (32 - bits)) == 0
+
+
+@njit(cache=True, boundscheck=False)
+def _find_nonce(midstate, tail, k, difficulty, start, stop, nonce_size, messages, state, w, v):
+    """
+    Scan nonces in [start, stop), LANES consecutive nonces per compression
+
+    Args:
+        midstate: SHA-256 state after absorbing the full blocks of the prefix
+        tail: Final padded block(s) with a zeroed nonce slot after the prefix remainder
+        k: SHA-256 round constants
+        difficulty: Required leading zero nibbles
+        start: First nonce to try
+        stop: Nonce to stop before
+        nonce_size: Width of the little-endian nonce slot
+        messages: Scratch buffer of LANES * (len(tail) - 1) bytes
+        state: Scratch buffer of 8 * LANES words
+        w: Scratch buffer of 64 * LANES words
+        v: Scratch buffer of 8 * LANES words
+
+    Returns:
+        int: Lowest winning nonce, or -1 if none was found
+    """
+    slot = tail[0]
+    message_len = len(tail) - 1
+    for lane in range(LANES):
+        for i in range(message_len):
+            messages[lane * message_len + i] = tail[i + 1]
+
+    for base in range(start, stop, LANES):
+        for lane in range(LANES):
+            value = base + lane
+            for i in range(nonce_size):
+                messages[lane * message_len + slot + i] = value & 0xFF
+                value >>= 8
+        for i in range(8):
+            for lane in range(LANES):
+                state[i * LANES + lane] = midstate[i]
+        for offset in range(0, message_len, 64):
+            _compress_lanes(state, messages, message_len, offset, k, w, v)
+        for lane in range(LANES):
+            if base + lane < stop and _lane_meets_zero_nibbles(state, lane, difficulty):
+                return base + lane
+    return -1
+
+
+def _words(size: int):
+    """Allocate a zeroed word buffer for the kernels"""
+    if NUMBA_AVAILABLE:
+        return np.zeros(size, dtype=np.int64)
+    return [0] * size
+
+
+def prepare_prefix(prefix: bytes, nonce_size: int):
+    """
+    Precompute the SHA-256 midstate and final block layout for a header prefix
+
+    Args:
+        prefix: Serialized header without the nonce
+        nonce_size: Width of the nonce appended to the prefix
+
+    Returns:
+        tuple: (midstate words, tail words) where tail[0] is the nonce offset
+        inside the padded final block(s) stored in tail[1:]
+    """
+    full_len = len(prefix) - len(prefix) % 64
+    state = list(SHA256_IV)
+    w = [0] * 64
+    for offset in range(0, full_len, 64):
+        _compress(state, prefix, offset, SHA256_K, w)
+
+    remainder = prefix[full_len:]
+    message_len = len(prefix) + nonce_size
+    final = bytearray(remainder) + bytes(nonce_size) + b'\x80'
+    final += bytes((56 - len(final)) % 64)
+    final += (message_len * 8).to_bytes(8, 'big')
+    return state, [len(remainder)] + list(final)
+
+
+def find_nonce(prefix: bytes, difficulty: int, max_attempts: int, nonce_size: int,
+               deadline: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Search PoW or light PoW nonces with the compiled kernel
+
+    Args:
+        prefix: Serialized header without the nonce
+        difficulty: Required leading zero nibbles
+        max_attempts: Maximum number of nonces to try
+        nonce_size: Width of the little-endian nonce
+        deadline: Optional time.monotonic() value after which the search stops
+
+    Returns:
+        Tuple[int, int]: (winning nonce or -1, attempts made)
+    """
+    midstate, tail = prepare_prefix(prefix, nonce_size)
+    if NUMBA_AVAILABLE:
+        midstate = np.array(midstate, dtype=np.int64)
+        tail = np.array(tail, dtype=np.int64)
+        k = np.array(SHA256_K, dtype=np.int64)
+    else:
+        k = list(SHA256_K)
+    messages = _words(LANES * (len(tail) - 1))
+    state = _words(8 * LANES)
+    w = _words(64 * LANES)
+    v = _words(8 * LANES)
+
+    chunk = max_attempts if deadline is None else DEADLINE_CHUNK
+    start = 0
+    while start < max_attempts:
+        stop = min(start + chunk, max_attempts)
+        nonce = _find_nonce(midstate, tail, k, difficulty, start, stop, nonce_size,
+                            messages, state, w, v)
+        if nonce >= 0:
+            return nonce, nonce + 1
+        start = stop
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    return -1, start
@@ -4,8 +4,9 @@ Block structure implementation
 
 import time
 import hashlib
-import json
-from typing import List
+from json.encoder import encode_basestring_ascii
+from typing import Dict, List, Optional, Tuple, Union
+from .transaction import Transaction, _HEADER_ENCODER, _json_value
 
 
 class Block:
@@ -13,6 +14,13 @@ class Block:
     Represents a block in the blockchain
     """
     
+    __slots__ = ('height', 'prev_hash', 'transactions', 'timestamp', 'nonce', 'hash',
+                 'proposer_id', 'expected_leader', 'is_backup_proposal', 'pow_verified_hash',
+                 '_transactions_json', '_balance_deltas')
+    
+    # Width of the little-endian nonce appended to the header prefix when hashing
+    NONCE_SIZE = 8
+    
     def __init__(self, height: int, prev_hash: str, transactions: List, timestamp: float = None, nonce: int = 0):
         """
         Initialize a new block
@@ -29,25 +37,118 @@ class Block:
         self.transactions = transactions or []
         self.timestamp = timestamp if timestamp is not None else time.time()
         self.nonce = nonce
-        self.proposer_id: str = ""  # ID of the node that proposed this block
+        self.proposer_id: Optional[Union[str, int]] = None  # ID of the node that proposed this block
+        self.expected_leader: Optional[int] = None  # Active leader when the block was created
+        self.is_backup_proposal: bool = False  # True if proposed by a backup leader
+        self.pow_verified_hash: Optional[str] = None  # Hash last checked by consensus, not serialized
+        self._transactions_json: Optional[Tuple[list, int, str]] = None  # (list, length, JSON) for header_prefix
+        self._balance_deltas: Optional[Tuple[list, int, Dict[str, float]]] = None  # (list, length, deltas)
         self.hash = self.calculate_hash()
     
-    def calculate_hash(self) -> str:
+    def header_prefix(self) -> bytes:
+        """
+        Serialize every hashed field except the nonce
+        
+        The nonce is appended last, so miners can hash this prefix once and
+        only feed the nonce bytes per attempt.
+        
+        Returns:
+            bytes: Serialized block header without the nonce
+        """
+        # Byte-for-byte the json.dumps(header_dict, sort_keys=True) layout, written
+        # directly in sorted key order instead of building and sorting dicts
+        transactions = self._serialized_transactions()
+        return (f'{{"height": {_json_value(self.height)}, '
+                f'"prev_hash": {_json_value(self.prev_hash)}, '
+                f'"timestamp": {_json_value(self.timestamp)}, '
+                f'"transactions": [{transactions}]}}').encode()
+    
+    def _serialized_transactions(self) -> str:
+        """
+        Serialize the transaction list once and reuse it for later hashes
+        
+        Transactions are treated as immutable once in a block; the cache is
+        rebuilt only if the list is replaced or changes length.
+        
+        Returns:
+            str: Comma-separated JSON of the block's transactions
+        """
+        transactions = self.transactions
+        cached = self._transactions_json
+        if cached is None or cached[0] is not transactions or cached[1] != len(transactions):
+            text = ', '.join([self._transaction_json(tx) for tx in transactions])
+            cached = (transactions, len(transactions), text)
+            self._transactions_json = cached
+        return cached[2]
+    
+    def balance_deltas(self) -> Dict[str, float]:
+        """
+        Net balance change per address from this block's transactions
+        
+        Computed once and cached like the serialized transactions, so a block
+        applied and reverted across reorganizations is only summed once.
+        
+        Returns:
+            Dict[str, float]: Address -> amount to add to its balance
+        """
+        transactions = self.transactions
+        cached = self._balance_deltas
+        if cached is None or cached[0] is not transactions or cached[1] != len(transactions):
+            deltas: Dict[str, float] = {}
+            for tx in transactions:
+                if isinstance(tx, Transaction):
+                    deltas[tx.sender] = deltas.get(tx.sender, 0.0) - tx.amount
+                    deltas[tx.receiver] = deltas.get(tx.receiver, 0.0) + tx.amount
+            cached = (transactions, len(transactions), deltas)
+            self._balance_deltas = cached
+        return cached[2]
+    
+    @staticmethod
+    def _transaction_json(tx) -> str:
+        """
+        Serialize one transaction the way header_prefix() embeds it
+        
+        Args:
+            tx: Transaction object or plain value
+            
+        Returns:
+            str: JSON text for the transaction
+        """
+        if type(tx) is Transaction:
+            # Transaction.to_dict() fields in sorted key order
+            return (f'{{"amount": {_json_value(tx.amount)}, "hash": {_json_value(tx.hash)}, '
+                    f'"receiver": {_json_value(tx.receiver)}, "sender": {_json_value(tx.sender)}, '
+                    f'"signature": {_json_value(tx.signature)}, "timestamp": {_json_value(tx.timestamp)}}}')
+        if hasattr(tx, 'to_dict'):
+            return _HEADER_ENCODER.encode(tx.to_dict())
+        return encode_basestring_ascii(str(tx))
+    
+    def calculate_hash_bytes(self, prefix: Optional[bytes] = None) -> bytes:
+        """
+        Calculate the raw SHA256 digest of the block
+        
+        Args:
+            prefix: Already serialized header_prefix() to reuse, if any
+            
+        Returns:
+            bytes: 32-byte digest of the block
+        """
+        if prefix is None:
+            prefix = self.header_prefix()
+        nonce_bytes = self.nonce.to_bytes(self.NONCE_SIZE, 'little')
+        return hashlib.sha256(prefix + nonce_bytes).digest()
+    
+    def calculate_hash(self, prefix: Optional[bytes] = None) -> str:
         """
         Calculate SHA256 hash of the block
         
+        Args:
+            prefix: Already serialized header_prefix() to reuse, if any
+            
         Returns:
             str: Hash of the block
         """
-        block_data = {
-            'height': self.height,
-            'prev_hash': self.prev_hash,
-            'transactions': [tx.to_dict() if hasattr(tx, 'to_dict') else str(tx) for tx in self.transactions],
-            'timestamp': self.timestamp,
-            'nonce': self.nonce
-        }
-        block_string = json.dumps(block_data, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        return self.calculate_hash_bytes(prefix).hex()
     
     def to_dict(self) -> dict:
         """
@@ -62,7 +163,7 @@ class Block:
             'transactions': [tx.to_dict() if hasattr(tx, 'to_dict') else str(tx) for tx in self.transactions],
             'timestamp': self.timestamp,
             'nonce': self.nonce,
-            'proposer_id': getattr(self, 'proposer_id', ''),
+            'proposer_id': self.proposer_id,
             'hash': self.hash
         }
     
@@ -77,9 +178,6 @@ class Block:
         Returns:
             Block: New block instance
         """
-        # Import here to avoid circular imports
-        from .transaction import Transaction
-        
         transactions = []
         for tx_data in data.get('transactions', []):
             if isinstance(tx_data, dict):
@@ -95,7 +193,7 @@ class Block:
             timestamp=data['timestamp'],
             nonce=data['nonce']
         )
-        block.proposer_id = data.get('proposer_id', '')
+        block.proposer_id = data.get('proposer_id')
         # Use the hash from data if provided, otherwise calculate it
         if 'hash' in data and data['hash']:
             block.hash = data['hash']
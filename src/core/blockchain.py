@@ -3,7 +3,7 @@ Blockchain logic implementation
 """
 
 import time
-from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+from typing import List, Dict, Optional, Set, Tuple, TYPE_CHECKING
 from .block import Block
 from .transaction import Transaction
 
@@ -28,13 +28,16 @@ class Blockchain:
         self.consensus = consensus
         self.main_chain: List[Block] = []
         self.all_blocks: Dict[str, Block] = {}  # hash -> block
+        self.children: Dict[str, List[str]] = {}  # parent hash -> child hashes, in arrival order
         self.pending_transactions: List[Transaction] = []
+        self.pending_hashes: Set[str] = set()  # Hashes in pending_transactions
         self.balances: Dict[str, float] = {}
         
         # Create and add genesis block
         genesis = self.create_genesis_block()
         self.main_chain.append(genesis)
         self.all_blocks[genesis.hash] = genesis
+        self._tip: Block = genesis  # Always main_chain[-1]
     
     def set_consensus(self, consensus: 'ConsensusAlgorithm') -> None:
         """
@@ -68,7 +71,7 @@ class Blockchain:
         Returns:
             Block: Latest block
         """
-        return self.main_chain[-1] if self.main_chain else self.create_genesis_block()
+        return self._tip
     
     def is_valid_block(self, block: Block) -> bool:
         """
@@ -120,26 +123,35 @@ class Blockchain:
         if block.hash in self.all_blocks:
             return True
         
-        # Add to all blocks
+        # Add to all blocks and index it under its parent
         self.all_blocks[block.hash] = block
+        self.children.setdefault(block.prev_hash, []).append(block.hash)
         
         # Check if this extends the main chain
         if block.prev_hash == self.get_latest_block().hash:
             self.main_chain.append(block)
+            self._tip = block
             # Update balances when new block is added to main chain
             self.update_balances_from_block(block)
             
             # After adding to main chain, try to process any pending blocks
             self._process_pending_blocks()
+        elif block.prev_hash not in self.all_blocks and not self.children.get(block.hash):
+            # A leaf whose parent is still missing is not reachable from genesis,
+            # so keep it stored only. A block with buffered descendants may
+            # connect a longer branch and always goes through fork resolution.
+            pass
         else:
             # Fork detected - need to resolve using consensus algorithm
+            old_chain = self.main_chain
             if self.consensus:
                 self.resolve_forks_with_consensus()
             else:
                 # Fallback to simple longest chain if no consensus algorithm
                 self.resolve_forks_fallback()
-            # After fork resolution, recalculate all balances
-            self.recalculate_balances()
+            # After fork resolution, move balances across the reorganized blocks
+            if self.main_chain is not old_chain:
+                self._reorganize_balances(old_chain, self.main_chain)
         
         return True
     
@@ -147,22 +159,26 @@ class Blockchain:
         """
         Process any blocks that were received out of order
         """
-        processed_any = True
-        while processed_any:
-            processed_any = False
-            latest_block = self.get_latest_block()
-            
-            # Look for blocks that can extend the current main chain
-            for block_hash, block in self.all_blocks.items():
-                if (block.prev_hash == latest_block.hash and 
-                    block.height == latest_block.height + 1 and
-                    block.hash not in [b.hash for b in self.main_chain]):
-                    
-                    # Found a block that extends the chain
-                    self.main_chain.append(block)
-                    self.update_balances_from_block(block)
-                    processed_any = True
+        all_blocks = self.all_blocks
+        children = self.children
+        latest_block = self.get_latest_block()
+        
+        # Follow the child index from the tip; the first child that arrived with
+        # the right height extends the chain. A child of the tip cannot already
+        # be on the main chain, so no membership check is needed
+        while True:
+            for child_hash in children.get(latest_block.hash, ()):
+                block = all_blocks[child_hash]
+                if block.height == latest_block.height + 1:
                     break
+            else:
+                return
+            
+            # Found a block that extends the chain
+            self.main_chain.append(block)
+            self._tip = block
+            self.update_balances_from_block(block)
+            latest_block = block
     
     def get_final_blocks(self) -> List[Block]:
         """
@@ -207,8 +223,8 @@ class Blockchain:
         if not self.consensus:
             return
             
-        # Find all possible chains starting from genesis
-        all_chains = self._find_all_chains()
+        # Find the chain to every leaf starting from genesis
+        all_chains = self._find_leaf_chains()
         
         if not all_chains:
             return
@@ -227,6 +243,7 @@ class Blockchain:
         if best_chain and len(best_chain) != len(self.main_chain):
             old_chain_length = len(self.main_chain)
             self.main_chain = best_chain
+            self._tip = best_chain[-1]
             
             # Log chain reorganization
             if hasattr(self.consensus, '_log_partition_event'):
@@ -252,39 +269,91 @@ class Blockchain:
         """
         Fallback fork resolution using the longest chain rule (for backward compatibility)
         """
-        # Find all possible chains starting from genesis
-        all_chains = self._find_all_chains()
-        
-        if not all_chains:
-            return
-        
-        # Select longest chain (ties broken by hash)
-        best_chain = max(all_chains, key=lambda chain: (len(chain), chain[-1].hash))
+        # Find the tip of the longest chain (ties broken by hash)
+        head, length = self._find_head()
         
         # Update main chain if a longer one is found
-        if len(best_chain) > len(self.main_chain):
-            self.main_chain = best_chain
+        if head is not None and length > len(self.main_chain):
+            self.main_chain = self._chain_ending_at(head)
+            self._tip = head
     
-    def _find_all_chains(self) -> List[List[Block]]:
-        """Find all valid chains from genesis"""
+    def _find_leaf_chains(self) -> List[List[Block]]:
+        """
+        Find the chain from genesis to every leaf block
+        
+        Shorter chains are prefixes of these, and select_best_chain already
+        falls back to the valid prefix of a chain, so they are not listed.
+        
+        Returns:
+            List[List[Block]]: One chain per leaf, in arrival order
+        """
         if not self.main_chain:
             return []
         
         chains = []
+        all_blocks = self.all_blocks
+        children = self.children
+        
+        # Depth-first over the child index with a single shared path, copied
+        # only when it reaches a leaf
+        path: List[Block] = []
+        stack = [(self.main_chain[0], 0)]
+        while stack:
+            block, depth = stack.pop()
+            del path[depth:]
+            path.append(block)
+            child_hashes = children.get(block.hash)
+            if child_hashes:
+                stack.extend((all_blocks[child_hash], depth + 1) for child_hash in reversed(child_hashes))
+            else:
+                chains.append(path[:])
+        
+        return chains
+    
+    def _find_head(self) -> Tuple[Optional[Block], int]:
+        """
+        Find the tip of the longest chain from genesis without building every chain
+        
+        Returns:
+            Tuple[Optional[Block], int]: (tip block, chain length); ties go to the higher hash
+        """
+        if not self.main_chain:
+            return None, 0
+        
+        all_blocks = self.all_blocks
+        children = self.children
         genesis = self.main_chain[0]
+        best_key = (1, genesis.hash)
+        
+        # Only leaves can end a longest chain, so just track depth per block
+        stack = [(genesis.hash, 1)]
+        while stack:
+            block_hash, length = stack.pop()
+            child_hashes = children.get(block_hash)
+            if child_hashes:
+                stack.extend((child_hash, length + 1) for child_hash in child_hashes)
+            elif (length, block_hash) > best_key:
+                best_key = (length, block_hash)
+        
+        return all_blocks[best_key[1]], best_key[0]
+    
+    def _chain_ending_at(self, tip: Block) -> List[Block]:
+        """
+        Rebuild the chain from genesis to a block by following parent hashes
         
-        def build_chain(current_chain: List[Block], last_block: Block):
-            chains.append(current_chain[:])  # Copy current chain
+        Args:
+            tip: Last block of the chain; must descend from genesis
             
-            # Find all blocks that extend this chain
-            for block in self.all_blocks.values():
-                if block.prev_hash == last_block.hash and block not in current_chain:
-                    current_chain.append(block)
-                    build_chain(current_chain, block)
-                    current_chain.pop()
-        
-        build_chain([genesis], genesis)
-        return chains
+        Returns:
+            List[Block]: Chain from genesis to tip
+        """
+        all_blocks = self.all_blocks
+        genesis = self.main_chain[0]
+        chain = [tip]
+        while chain[-1] is not genesis:
+            chain.append(all_blocks[chain[-1].prev_hash])
+        chain.reverse()
+        return chain
     
     def get_balance(self, address: str) -> float:
         """
@@ -317,13 +386,6 @@ class Blockchain:
         if sender_balance < transaction.amount:
             return False
         
-        # Check for double spending in pending transactions
-        for pending_tx in self.pending_transactions:
-            if (pending_tx.sender == transaction.sender and 
-                pending_tx.hash != transaction.hash):
-                # This is a simplified check
-                continue
-        
         return True
     
     def add_pending_transaction(self, transaction: Transaction) -> None:
@@ -333,8 +395,14 @@ class Blockchain:
         Args:
             transaction: Transaction to add
         """
+        # A transaction already in the pool (e.g. received again from a peer)
+        # would otherwise be mined twice
+        if transaction.hash in self.pending_hashes:
+            return
+        
         if self.validate_transaction(transaction):
             self.pending_transactions.append(transaction)
+            self.pending_hashes.add(transaction.hash)
     
     def get_pending_transactions(self, max_count: int = 10) -> List[Transaction]:
         """
@@ -362,6 +430,7 @@ class Blockchain:
             tx for tx in self.pending_transactions 
             if tx.hash not in tx_hashes
         ]
+        self.pending_hashes.difference_update(tx_hashes)
     
     def update_balances_from_block(self, block: Block) -> None:
         """
@@ -370,15 +439,44 @@ class Blockchain:
         Args:
             block: Block to process transactions from
         """
-        for tx in block.transactions:
-            if isinstance(tx, Transaction):
-                # Deduct from sender
-                sender_balance = self.balances.get(tx.sender, 0.0)
-                self.balances[tx.sender] = sender_balance - tx.amount
-                
-                # Add to receiver
-                receiver_balance = self.balances.get(tx.receiver, 0.0)
-                self.balances[tx.receiver] = receiver_balance + tx.amount
+        balances = self.balances
+        for address, delta in block.balance_deltas().items():
+            balances[address] = balances.get(address, 0.0) + delta
+    
+    def revert_balances_from_block(self, block: Block) -> None:
+        """
+        Undo the balance changes of a block leaving the main chain
+        
+        Args:
+            block: Block to reverse transactions from
+        """
+        balances = self.balances
+        for address, delta in block.balance_deltas().items():
+            balances[address] = balances.get(address, 0.0) - delta
+    
+    def _reorganize_balances(self, old_chain: List[Block], new_chain: List[Block]) -> None:
+        """
+        Move balances from one main chain to another through their fork point
+        
+        Args:
+            old_chain: Main chain before fork resolution
+            new_chain: Main chain after fork resolution
+        """
+        # Both chains are hash-linked from genesis, so they match up to the fork
+        # point and differ after it; binary search for the first difference
+        low, high = 0, min(len(old_chain), len(new_chain))
+        while low < high:
+            mid = (low + high) // 2
+            if old_chain[mid].hash == new_chain[mid].hash:
+                low = mid + 1
+            else:
+                high = mid
+        
+        # Undo the abandoned blocks newest first, then apply the adopted ones
+        for block in reversed(old_chain[low:]):
+            self.revert_balances_from_block(block)
+        for block in new_chain[low:]:
+            self.update_balances_from_block(block)
     
     def recalculate_balances(self) -> None:
         """
@@ -2,44 +2,79 @@
 Cryptographic functions and utilities
 """
 
-import hashlib
-import json
-from typing import Any
-
-
-"""
-Cryptographic functions and utilities
-"""
-
 import hashlib
 import json
 import secrets
-from typing import Any
+from typing import Any, List, Tuple, Union
 
 
-def calculate_sha256(data: str) -> str:
+def calculate_sha256(data: Union[bytes, str]) -> str:
     """
     Calculate SHA256 hash of input data
     
     Args:
-        data: Data to hash
+        data: Data to hash; strings are UTF-8 encoded first
         
     Returns:
         str: SHA256 hash as hexadecimal string
     """
-    return hashlib.sha256(data.encode()).hexdigest()
+    if not isinstance(data, bytes):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def _leaf_digest(tx: Any) -> bytes:
+    """
+    Raw 32-byte Merkle leaf for a transaction
+    
+    Args:
+        tx: Transaction object or plain value
+        
+    Returns:
+        bytes: Leaf for the transaction hash, or SHA256 of str(tx) if there is no hash
+    """
+    tx_hash = getattr(tx, 'hash', None)
+    if tx_hash is None:
+        return hashlib.sha256(str(tx).encode()).digest()
+    return _hash_leaf(tx_hash)
+
+
+def _hash_leaf(tx_hash: Any) -> bytes:
+    """
+    Raw 32-byte Merkle leaf for a transaction hash value
+    
+    Args:
+        tx_hash: Transaction hash, normally 64 hex characters
+        
+    Returns:
+        bytes: Decoded hash, or SHA256 of any other hash value
+    """
+    tx_hash = str(tx_hash)
+    if len(tx_hash) == 64:
+        try:
+            return bytes.fromhex(tx_hash)
+        except ValueError:
+            pass
+    # Anything that is not a 32-byte hex digest is hashed as a value
+    return hashlib.sha256(tx_hash.encode()).digest()
 
 
 def hash_object(obj: Any) -> str:
     """
     Hash any object by converting to JSON first
     
+    Objects with a canonical_bytes() method (e.g. Transaction) are hashed
+    from it directly instead of going through json.dumps.
+    
     Args:
         obj: Object to hash
         
     Returns:
         str: SHA256 hash of the object
     """
+    canonical_bytes = getattr(obj, 'canonical_bytes', None)
+    if canonical_bytes is not None:
+        return hashlib.sha256(canonical_bytes()).hexdigest()
     json_str = json.dumps(obj, sort_keys=True)
     return calculate_sha256(json_str)
 
@@ -57,26 +92,50 @@ def generate_merkle_root(transactions: list) -> str:
     if not transactions:
         return "0" * 64
     
-    # Convert transactions to hashes
-    hashes = []
-    for tx in transactions:
-        if hasattr(tx, 'hash'):
-            hashes.append(tx.hash)
-        else:
-            hashes.append(calculate_sha256(str(tx)))
+    # Each level is one contiguous buffer of raw 32-byte digests; hex is
+    # only produced for the root
+    level = bytearray(b''.join([_leaf_digest(tx) for tx in transactions]))
+    sha256 = hashlib.sha256
+    
+    # Build Merkle tree, each node hashing one 64-byte slice of the level
+    size = len(level)
+    while size > 32:
+        if size & 32:
+            level += level[-32:]  # Duplicate if odd number
+            size += 32
+        with memoryview(level) as view:
+            level = bytearray(b''.join([sha256(view[offset:offset + 64]).digest()
+                                        for offset in range(0, size, 64)]))
+        size //= 2
     
-    # Build Merkle tree
+    return level.hex()
+
+
+def generate_merkle_proof(transactions: list, index: int) -> List[Tuple[str, bool]]:
+    """
+    Build the Merkle proof for one transaction
+    
+    Args:
+        transactions: List of transactions
+        index: Position of the transaction to prove
+        
+    Returns:
+        List[Tuple[str, bool]]: (sibling hash, sibling is on the right) per level
+    """
+    hashes = [_leaf_digest(tx) for tx in transactions]
+    proof = []
+    
+    # Same pairing as generate_merkle_root, recording the sibling at each level
     while len(hashes) > 1:
-        new_hashes = []
-        for i in range(0, len(hashes), 2):
-            if i + 1 < len(hashes):
-                combined = hashes[i] + hashes[i + 1]
-            else:
-                combined = hashes[i] + hashes[i]  # Duplicate if odd number
-            new_hashes.append(calculate_sha256(combined))
-        hashes = new_hashes
+        if len(hashes) & 1:
+            hashes.append(hashes[-1])  # Duplicate if odd number
+        sibling_index = index ^ 1
+        proof.append((hashes[sibling_index].hex(), sibling_index > index))
+        hashes = [hashlib.sha256(hashes[i] + hashes[i + 1]).digest()
+                  for i in range(0, len(hashes), 2)]
+        index //= 2
     
-    return hashes[0]
+    return proof
 
 
 def verify_merkle_proof(transaction_hash: str, merkle_proof: list, merkle_root: str) -> bool:
@@ -85,23 +144,35 @@ def verify_merkle_proof(transaction_hash: str, merkle_proof: list, merkle_root:
     
     Args:
         transaction_hash: Hash of the transaction
-        merkle_proof: List of hashes forming the proof
+        merkle_proof: (sibling hash, sibling is on the right) pairs, as built by
+            generate_merkle_proof
         merkle_root: Expected Merkle root
         
     Returns:
         bool: True if proof is valid
     """
-    current_hash = transaction_hash
+    # Same leaf rule and raw-digest nodes as generate_merkle_root
+    current_hash = _hash_leaf(transaction_hash)
     
-    for proof_hash in merkle_proof:
-        # Try both combinations (proof could be left or right sibling)
-        option1 = calculate_sha256(current_hash + proof_hash)
-        option2 = calculate_sha256(proof_hash + current_hash)
+    for proof_entry in merkle_proof:
+        # A bare sibling hash does not say which side it is on
+        if isinstance(proof_entry, str):
+            return False
         
-        # Use the lexicographically smaller one for consistency
-        current_hash = option1 if option1 < option2 else option2
+        # A malformed entry cannot be part of a valid proof
+        try:
+            proof_hash, sibling_on_right = proof_entry
+            sibling = bytes.fromhex(proof_hash)
+        except (TypeError, ValueError):
+            return False
+        
+        # Hash the pair once in tree order
+        if sibling_on_right:
+            current_hash = hashlib.sha256(current_hash + sibling).digest()
+        else:
+            current_hash = hashlib.sha256(sibling + current_hash).digest()
     
-    return current_hash == merkle_root
+    return current_hash.hex() == merkle_root
 
 
 class SimpleSignature:
@@ -3,9 +3,38 @@ Transaction handling implementation
 """
 
 import time
+import math
 import hashlib
 import json
-from typing import Optional
+from json.encoder import encode_basestring_ascii
+from typing import Any, Optional
+
+
+# Fallback for values the fast path in _json_value does not cover; matches
+# json.dumps(..., sort_keys=True) without building a new encoder per call
+_HEADER_ENCODER = json.JSONEncoder(sort_keys=True)
+
+
+def _json_value(value: Any) -> str:
+    """
+    Encode a header field exactly as json.dumps(..., sort_keys=True) would
+    
+    Args:
+        value: Field value
+        
+    Returns:
+        str: JSON text for the value
+    """
+    value_type = type(value)
+    if value_type is str:
+        return encode_basestring_ascii(value)
+    if value_type is int:
+        return int.__repr__(value)
+    if value_type is float and math.isfinite(value):
+        return float.__repr__(value)
+    if value is None:
+        return 'null'
+    return _HEADER_ENCODER.encode(value)
 
 
 class Transaction:
@@ -37,14 +66,21 @@ class Transaction:
         Returns:
             str: Hash of the transaction
         """
-        tx_data = {
-            'sender': self.sender,
-            'receiver': self.receiver,
-            'amount': self.amount,
-            'timestamp': self.timestamp
-        }
-        tx_string = json.dumps(tx_data, sort_keys=True)
-        return hashlib.sha256(tx_string.encode()).hexdigest()
+        return hashlib.sha256(self.canonical_bytes()).hexdigest()
+    
+    def canonical_bytes(self) -> bytes:
+        """
+        Serialize the hashed fields in a fixed order
+        
+        Returns:
+            bytes: Hash preimage of the transaction
+        """
+        # Byte-for-byte the json.dumps(tx_data, sort_keys=True) layout, so
+        # transaction hashes are unchanged
+        return (f'{{"amount": {_json_value(self.amount)}, '
+                f'"receiver": {_json_value(self.receiver)}, '
+                f'"sender": {_json_value(self.sender)}, '
+                f'"timestamp": {_json_value(self.timestamp)}}}').encode()
     
     def sign(self, private_key: str) -> None:
         """
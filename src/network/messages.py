@@ -14,6 +14,7 @@ class MessageType(Enum):
     BLOCK_PROPOSAL = "block_proposal"
     BLOCK_CONFIRMATION = "block_confirmation"
     TRANSACTION_BROADCAST = "transaction_broadcast"
+    TRANSACTION_BATCH = "transaction_batch"
     CHAIN_REQUEST = "chain_request"
     CHAIN_RESPONSE = "chain_response"
     HEARTBEAT = "heartbeat"
@@ -83,6 +84,9 @@ class NetworkMessage:
             payload = Block.from_dict(payload)
         elif message_type == MessageType.TRANSACTION_BROADCAST and isinstance(payload, dict):
             payload = Transaction.from_dict(payload)
+        elif message_type == MessageType.TRANSACTION_BATCH and isinstance(payload, list):
+            payload = [Transaction.from_dict(tx_data) if isinstance(tx_data, dict) else tx_data
+                      for tx_data in payload]
         elif message_type == MessageType.CHAIN_RESPONSE and isinstance(payload, list):
             payload = [Block.from_dict(block_data) if isinstance(block_data, dict) else block_data 
                       for block_data in payload]
@@ -138,6 +142,27 @@ class TransactionBroadcast(NetworkMessage):
         )
 
 
+class TransactionBatch(NetworkMessage):
+    """Message for broadcasting several transactions in one frame"""
+    
+    def __init__(self, sender_id: str, transactions: list, timestamp: Optional[float] = None):
+        """
+        Initialize transaction batch message
+        
+        Args:
+            sender_id: ID of sending node
+            transactions: Transactions being broadcast
+            timestamp: Message timestamp
+        """
+        super().__init__(
+            sender_id=sender_id,
+            receiver_id=None,  # Broadcast
+            message_type=MessageType.TRANSACTION_BATCH,
+            payload=transactions,
+            timestamp=timestamp
+        )
+
+
 class ChainRequest(NetworkMessage):
     """Message requesting chain synchronization"""
     
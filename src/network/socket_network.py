@@ -3,13 +3,13 @@ Simple TCP socket-based network communication for blockchain nodes
 """
 
 import socket
-import json
 import threading
 import time
 import logging
 from typing import Dict, Optional, Callable
 from queue import Queue, Empty
 from .messages import NetworkMessage, MessageType
+from ..util import serde
 
 
 class SocketServer:
@@ -93,8 +93,7 @@ class SocketServer:
                 return
                 
             # Decode and handle message
-            message_json = message_data.decode('utf-8')
-            message_dict = json.loads(message_json)
+            message_dict = serde.loads(message_data)
             
             # Convert back to NetworkMessage object
             message = NetworkMessage(
@@ -139,20 +138,16 @@ class SocketClient:
         try:
             # Convert message to JSON using the message's to_dict method
             message_dict = message.to_dict()
-            message_json = json.dumps(message_dict)
-            message_bytes = message_json.encode('utf-8')
+            message_bytes = serde.dumps(message_dict)
             
             # Connect and send
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
                 sock.settimeout(5.0)  # 5 second timeout
                 sock.connect(('localhost', target_port))
                 
-                # Send message length first (4 bytes)
+                # Send length-prefixed frame (4-byte length + message) in one call
                 length_bytes = len(message_bytes).to_bytes(4, byteorder='big')
-                sock.send(length_bytes)
-                
-                # Send the actual message
-                sock.send(message_bytes)
+                sock.sendall(length_bytes + message_bytes)
                 
             return True
             
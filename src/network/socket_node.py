@@ -1,14 +1,14 @@
 import time
 import logging
 import threading
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
 from ..core.blockchain import Blockchain
 from ..core.block import Block
 from ..core.transaction import Transaction
 from ..consensus.base import ConsensusAlgorithm
 from ..consensus.pow import ProofOfWork
 from ..consensus.hybrid import HybridConsensus
-from .messages import NetworkMessage, MessageType
+from .messages import NetworkMessage, MessageType, TransactionBatch
 from .socket_network import SocketNetworkSimulator
 
 
@@ -131,6 +131,22 @@ class SocketNode:
             "amount": transaction.amount
         })
     
+    def broadcast_transactions(self, transactions: List[Transaction]) -> None:
+        """Broadcast several transactions to all peers as a single message"""
+        if not transactions:
+            return
+        
+        # Add to our own pending transactions first
+        for transaction in transactions:
+            self.blockchain.add_pending_transaction(transaction)
+        
+        self.send_message(TransactionBatch(self.node_id, transactions))
+        
+        self.log_event("transaction_batch_broadcast", {
+            "count": len(transactions),
+            "hashes": [transaction.hash for transaction in transactions]
+        })
+    
     def propose_block(self, block: Block) -> None:
         """Propose a new block to the network"""
         message = NetworkMessage(
@@ -223,6 +239,8 @@ class SocketNode:
                 self._handle_block_proposal(message)
             elif message.message_type == MessageType.TRANSACTION_BROADCAST:
                 self._handle_transaction_broadcast(message)
+            elif message.message_type == MessageType.TRANSACTION_BATCH:
+                self._handle_transaction_batch(message)
             else:
                 self.logger.warning(f"Unknown message type: {message.message_type}")
                 
@@ -291,6 +309,25 @@ class SocketNode:
         except Exception as e:
             self.logger.error(f"Error handling transaction broadcast: {e}")
     
+    def _handle_transaction_batch(self, message: NetworkMessage) -> None:
+        """Handle transaction batch message"""
+        try:
+            for transaction in message.payload:
+                if not isinstance(transaction, Transaction):
+                    # Fallback: reconstruct from dict if needed
+                    transaction = Transaction.from_dict(transaction)
+                
+                # Add to pending transactions
+                self.blockchain.add_pending_transaction(transaction)
+            
+            self.log_event("transaction_batch_received", {
+                "count": len(message.payload),
+                "sender": message.sender_id
+            })
+            
+        except Exception as e:
+            self.logger.error(f"Error handling transaction batch: {e}")
+    
     def _mining_loop(self) -> None:
         """Mining loop for consensus algorithms"""
         while self.is_running:
@@ -4,6 +4,7 @@ Test scenarios for blockchain simulation
 
 import time
 import random
+import logging
 import threading
 from typing import List, Dict, Optional
 from ..network.node import Node
@@ -33,7 +34,6 @@ class ScenarioRunner:
         self.results = {}
         
         # Logging
-        import logging
         self.logger = logging.getLogger('scenario_runner')
     
     def run_scenario(self, scenario_type: str, seed: int) -> None:
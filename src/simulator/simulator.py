@@ -1,6 +1,7 @@
 import time
 import json
 import logging
+import random
 import threading
 from typing import List, Dict, Optional
 from ..network.node import Node
@@ -49,9 +50,8 @@ class Simulator:
         # Logger
         self.logger = logging.getLogger(f'simulator_{node_id}')
         
-        # Set random seed for deterministic behavior
-        import random
-        random.seed(seed)
+        # Seeded RNG for deterministic behavior
+        self._rng = random.Random(seed)
         
         self.logger.info(f"Simulator initialized for node {node_id}")
         self.logger.info(f"Consensus: {consensus_type}, Scenario: {scenario_type}, Seed: {seed}")
@@ -192,15 +192,13 @@ class Simulator:
         if not self.my_node or not self.is_running:
             return
         
-        import random
-        
         # Generate transaction occasionally
-        if random.random() < 0.3:  # 30% chance
+        if self._rng.random() < 0.3:  # 30% chance
             # Pick random receiver (not self)
             receivers = [str(i) for i in range(5) if str(i) != self.node_id]
             if receivers:
-                receiver = random.choice(receivers)
-                amount = random.uniform(1.0, 10.0)
+                receiver = self._rng.choice(receivers)
+                amount = self._rng.uniform(1.0, 10.0)
                 
                 # Check if we have sufficient balance
                 if self.my_node.get_balance() >= amount:
@@ -0,0 +1,78 @@
+"""
+JSON encoding helpers for config files, network messages and log events
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one type covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize an object to compact UTF-8 JSON
+    
+    Not used for hash preimages: output may differ between backends.
+    
+    Args:
+        obj: Object to serialize
+        
+    Returns:
+        bytes: JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_str(obj: Any) -> str:
+    """
+    Serialize an object to compact JSON text, e.g. for structured log lines
+    
+    Unlike dumps(), non-string dict keys are accepted and stringified the
+    way the standard library does.
+    
+    Args:
+        obj: Object to serialize
+        
+    Returns:
+        str: JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document
+    
+    Args:
+        data: JSON document as bytes or str
+        
+    Returns:
+        Any: Parsed object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class LazyJSON:
+    """
+    Defer serializing a log event until a handler formats the record
+    """
+    
+    __slots__ = ('data',)
+    
+    def __init__(self, data: dict):
+        self.data = data
+    
+    def __str__(self) -> str:
+        return dumps_str(self.data)
@@ -0,0 +1,55 @@
+"""
+Tests for blockchain fork handling
+"""
+
+from src.core.block import Block
+from src.core.blockchain import Blockchain
+
+
+def _extend(parent: Block, count: int, timestamp: float) -> list:
+    """Build count blocks on top of parent"""
+    blocks = []
+    for i in range(count):
+        parent = Block(parent.height + 1, parent.hash, [], timestamp=timestamp + i)
+        blocks.append(parent)
+    return blocks
+
+
+def test_connecting_block_switches_to_buffered_longer_branch():
+    blockchain = Blockchain()
+    genesis = blockchain.main_chain[0]
+    
+    main_blocks = _extend(genesis, 14, 1.0)
+    for block in main_blocks:
+        assert blockchain.add_block(block)
+    assert blockchain.get_latest_block().height == 14
+    
+    # Fork off block 8: heights 10..20 arrive before the block 9 linking them
+    fork_blocks = _extend(main_blocks[7], 12, 100.0)
+    for block in fork_blocks[1:]:
+        assert blockchain.add_block(block)
+    assert blockchain.get_latest_block().height == 14
+    
+    assert blockchain.add_block(fork_blocks[0])
+    assert blockchain.get_latest_block() is fork_blocks[-1]
+    assert blockchain.main_chain == [genesis] + main_blocks[:8] + fork_blocks
+
+
+def test_side_block_below_finality_goes_through_fork_resolution():
+    class RecordingBlockchain(Blockchain):
+        def resolve_forks_fallback(self):
+            self.resolutions += 1
+            super().resolve_forks_fallback()
+    
+    blockchain = RecordingBlockchain(finality_depth=2)
+    blockchain.resolutions = 0
+    genesis = blockchain.main_chain[0]
+    main_blocks = _extend(genesis, 6, 1.0)
+    for block in main_blocks:
+        blockchain.add_block(block)
+    assert blockchain.get_finality_height() >= 1
+    
+    side_block = Block(1, genesis.hash, [], timestamp=100.0)
+    assert blockchain.add_block(side_block)
+    assert blockchain.resolutions == 1
+    assert blockchain.get_latest_block() is main_blocks[-1]
@@ -0,0 +1,49 @@
+"""
+Tests for Merkle root and proof helpers
+"""
+
+import pytest
+
+from src.core.crypto import generate_merkle_proof, generate_merkle_root, verify_merkle_proof
+from src.core.transaction import Transaction
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 4, 5, 7, 8, 13])
+def test_merkle_proof_round_trip(count):
+    transactions = [Transaction('a', 'b', float(i + 1), timestamp=1.0) for i in range(count)]
+    root = generate_merkle_root(transactions)
+    
+    for index, tx in enumerate(transactions):
+        proof = generate_merkle_proof(transactions, index)
+        assert verify_merkle_proof(tx.hash, proof, root)
+        
+        # The same siblings on the wrong sides must not verify
+        if proof:
+            flipped = [(sibling, not on_right) for sibling, on_right in proof]
+            assert not verify_merkle_proof(tx.hash, flipped, root)
+
+
+def test_merkle_proof_rejects_entries_without_side():
+    transactions = [Transaction('a', 'b', float(i + 1), timestamp=1.0) for i in range(4)]
+    root = generate_merkle_root(transactions)
+    proof = generate_merkle_proof(transactions, 0)
+    
+    assert not verify_merkle_proof(transactions[0].hash, [sibling for sibling, _ in proof], root)
+
+
+def test_merkle_proof_for_leaf_with_non_hex_hash():
+    transactions = [Transaction('a', 'b', float(i + 1), timestamp=1.0) for i in range(3)]
+    transactions[1].hash = 'not-a-hex-hash'
+    root = generate_merkle_root(transactions)
+    proof = generate_merkle_proof(transactions, 1)
+    
+    assert verify_merkle_proof('not-a-hex-hash', proof, root)
+    assert not verify_merkle_proof('xyz', [], 'abc')
+
+
+@pytest.mark.parametrize('entry', [('zz' * 32, True), (None, False), ('00' * 32,), 42])
+def test_merkle_proof_rejects_malformed_entries(entry):
+    transactions = [Transaction('a', 'b', float(i + 1), timestamp=1.0) for i in range(2)]
+    root = generate_merkle_root(transactions)
+    
+    assert not verify_merkle_proof(transactions[0].hash, [entry], root)